@@ -1,3 +1,4 @@
+import contextvars
 import os
 import sys
 import json
@@ -18,9 +19,20 @@ try:
     from sentry_sdk.integrations.logging import LoggingIntegration
 
     from game_scanner.barcode2bgg import barcode2bgg
+    from game_scanner.bgg_client import get_client_stats
+    from game_scanner.bgg_throttle import get_throttle_stats
     from game_scanner.commands import process_register_response
-    from game_scanner.db import retrieve_document
-    from game_scanner.register_play import register_play
+    from game_scanner.db import (
+        get_firestore_usage_stats,
+        prewarm_db_connection,
+        retrieve_document,
+        track_firestore_usage,
+    )
+    from game_scanner.game_metadata import get_metadata_stats
+    from game_scanner.add_wishlist import add_games_to_collection
+    from game_scanner.register_play import delete_logged_plays, register_play
+    from game_scanner.schemas import CollectionBatchRequest, LogBatchDeletionRequest
+    from pydantic import ValidationError
     from game_scanner.save_bgg_id import save_bgg_id
     from game_scanner.user_auth import (
         authenticate_user,
@@ -51,10 +63,18 @@ try:
     else:
         logger.warning("SENTRY_DSN not set, distributed tracing disabled")
 
+    # Build the Firestore client while the first request is still being parsed
+    if os.getenv('FIRESTORE_PREWARM', '').lower() in ('1', 'true', 'yes'):
+        prewarm_db_connection()
+
 except ImportError as e:
     HAS_MODULES = False
     IMPORT_ERROR = str(e)
 
+# Plays or games one batch request may change
+MAX_BATCH_ITEMS = 100
+
+
 class handler(BaseHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         # Initialize telegram handlers
@@ -130,34 +150,42 @@ class handler(BaseHTTPRequestHandler):
             if self.telegram_handlers is None and HAS_MODULES:
                 self.telegram_handlers = TelegramHandlers(self)
 
-            # Route to different endpoints
-            if endpoint == "/register":
-                self._handle_user_registration(query_params)
-            elif endpoint == "/register_telegram":
-                if self.telegram_handlers:
-                    self.telegram_handlers.handle_telegram_registration(query_params)
-                else:
-                    self._send_error("Telegram handlers not available")
-            elif endpoint == "/delete_account":
-                self._handle_delete_account(query_params)
-            elif endpoint == "/users":
-                self._handle_list_users(query_params)
-            elif endpoint.startswith("/lookup"):
-                self._handle_lookup(query_params)
-            elif endpoint.startswith("/play"):
-                self._handle_play_registration(query_params)
-            elif endpoint == "/wishlist":
-                self._handle_wishlist_addition(query_params)
-            elif endpoint == "/owned":
-                self._handle_owned_addition(query_params)
-            elif endpoint.startswith("/telegram_mini_app"):
-                if self.telegram_handlers:
-                    self.telegram_handlers.handle_mini_app_static(endpoint)
+            # Route to different endpoints, attributing Firestore usage to the route
+            route = '/' + endpoint.strip('/').split('/')[0]
+            with track_firestore_usage(f"{self.command} {route}"):
+                if endpoint == "/register":
+                    self._handle_user_registration(query_params)
+                elif endpoint == "/register_telegram":
+                    if self.telegram_handlers:
+                        self.telegram_handlers.handle_telegram_registration(query_params)
+                    else:
+                        self._send_error("Telegram handlers not available")
+                elif endpoint == "/delete_account":
+                    self._handle_delete_account(query_params)
+                elif endpoint == "/users":
+                    self._handle_list_users(query_params)
+                elif endpoint == "/stats":
+                    self._handle_stats(query_params)
+                elif endpoint.startswith("/lookup"):
+                    self._handle_lookup(query_params)
+                elif endpoint == "/delete_plays":
+                    self._handle_play_deletions(query_params)
+                elif endpoint == "/collection":
+                    self._handle_collection_update(query_params)
+                elif endpoint.startswith("/play"):
+                    self._handle_play_registration(query_params)
+                elif endpoint == "/wishlist":
+                    self._handle_wishlist_addition(query_params)
+                elif endpoint == "/owned":
+                    self._handle_owned_addition(query_params)
+                elif endpoint.startswith("/telegram_mini_app"):
+                    if self.telegram_handlers:
+                        self.telegram_handlers.handle_mini_app_static(endpoint)
+                    else:
+                        self._send_error("Telegram handlers not available")
                 else:
-                    self._send_error("Telegram handlers not available")
-            else:
-                # Default: backward compatibility with existing interface
-                self._handle_legacy_request(query_params)
+                    # Default: backward compatibility with existing interface
+                    self._handle_legacy_request(query_params)
                 
         except Exception as e:
             print(f"Handler error: {e}")
@@ -246,6 +274,15 @@ class handler(BaseHTTPRequestHandler):
         except Exception as e:
             self._send_json({'error': f'Failed to list users: {str(e)}'}, status=500)
     
+    def _handle_stats(self, params):
+        """Handle usage statistics of this instance (admin endpoint)."""
+        self._send_json({
+            'firestore': get_firestore_usage_stats(),
+            'game_metadata': get_metadata_stats(),
+            'bgg': get_throttle_stats(),
+            'bgg_api': get_client_stats(),
+        })
+
     def _handle_lookup(self, params):
         """Handle barcode/game lookup (free feature)."""
         query = params.get("query")
@@ -352,11 +389,17 @@ class handler(BaseHTTPRequestHandler):
             self._send_json({'error': 'Missing query parameter'}, status=400)
             return
 
+        if params.get("queue"):
+            # Serverless instances keep neither the queue nor its worker around
+            self._send_json({'error': 'Queued plays are only available through the Telegram bot'}, status=400)
+            return
+
         try:
             # Parallel lookup: get game ID and verify credentials simultaneously
+            # (copied contexts keep Firestore usage attributed to this request)
             with ThreadPoolExecutor(max_workers=2) as executor:
-                game_future = executor.submit(self._get_game_id, bgg_id, bg_name, query)
-                creds_future = executor.submit(verify_and_get_credentials, api_key)
+                game_future = executor.submit(contextvars.copy_context().run, self._get_game_id, bgg_id, bg_name, query)
+                creds_future = executor.submit(contextvars.copy_context().run, verify_and_get_credentials, api_key)
 
                 game_id = game_future.result()
                 bgg_credentials = creds_future.result()
@@ -394,7 +437,9 @@ class handler(BaseHTTPRequestHandler):
                 })
                 sentry_sdk.capture_exception(e)
 
-            status = 401 if "login failed" in error_msg.lower() else 502
+            from game_scanner.errors import BGGLoginError
+
+            status = 401 if isinstance(e, BGGLoginError) else 502
             self._send_json({'error': error_msg}, status=status)
 
         except Exception as e:
@@ -444,8 +489,8 @@ class handler(BaseHTTPRequestHandler):
                 final_game_id = game_id
             else:
                 with ThreadPoolExecutor(max_workers=2) as executor:
-                    game_future = executor.submit(self._get_game_id, bgg_id, bg_name, query)
-                    creds_future = executor.submit(verify_and_get_credentials, api_key)
+                    game_future = executor.submit(contextvars.copy_context().run, self._get_game_id, bgg_id, bg_name, query)
+                    creds_future = executor.submit(contextvars.copy_context().run, verify_and_get_credentials, api_key)
 
                     final_game_id = game_future.result()
                     bgg_credentials = creds_future.result()
@@ -519,8 +564,8 @@ class handler(BaseHTTPRequestHandler):
                 final_game_id = game_id
             else:
                 with ThreadPoolExecutor(max_workers=2) as executor:
-                    game_future = executor.submit(self._get_game_id, bgg_id, bg_name, query)
-                    creds_future = executor.submit(verify_and_get_credentials, api_key)
+                    game_future = executor.submit(contextvars.copy_context().run, self._get_game_id, bgg_id, bg_name, query)
+                    creds_future = executor.submit(contextvars.copy_context().run, verify_and_get_credentials, api_key)
 
                     final_game_id = game_future.result()
                     bgg_credentials = creds_future.result()
@@ -563,6 +608,66 @@ class handler(BaseHTTPRequestHandler):
 
             self._send_json({'error': 'Collection addition failed - please try again'}, status=500)
 
+    def _handle_play_deletions(self, params):
+        """Handle deleting several plays over one BGG login (requires API key)."""
+        body = self._json_body(params)
+        api_key = body.get("api_key") or params.get("api_key")
+        play_ids = body.get("play_ids") or [i for i in params.get("play_ids", "").split(",") if i]
+        try:
+            play_ids = LogBatchDeletionRequest(play_ids=play_ids).play_ids
+        except ValidationError as e:
+            self._send_json({'error': f'Invalid play_ids: {e}'}, status=400)
+            return
+        self._handle_batch(api_key, play_ids, delete_logged_plays)
+
+    def _handle_collection_update(self, params):
+        """Handle setting the collection status of several games over one BGG login (requires API key)."""
+        body = self._json_body(params)
+        api_key = body.get("api_key") or params.get("api_key")
+        items = body.get("items")
+        if items is None:
+            # Form requests give one status for a comma-separated list of games
+            game_ids = [i for i in params.get("game_ids", "").split(",") if i]
+            items = [{"game_id": game_id, "status": params.get("status")} for game_id in game_ids]
+        try:
+            items = [item.model_dump() for item in CollectionBatchRequest(items=items).items]
+        except ValidationError as e:
+            self._send_json({'error': f'Invalid items: {e}'}, status=400)
+            return
+        self._handle_batch(api_key, items, add_games_to_collection)
+
+    def _handle_batch(self, api_key, items, action):
+        if not api_key:
+            self._send_json({
+                'error': 'API key required for batch operations',
+                'instructions': 'Get an API key by registering at /register'
+            }, status=401)
+            return
+
+        if not items:
+            self._send_json({'error': 'Nothing to do'}, status=400)
+            return
+        if len(items) > MAX_BATCH_ITEMS:
+            self._send_json({'error': f'At most {MAX_BATCH_ITEMS} items per request'}, status=400)
+            return
+
+        bgg_credentials = verify_and_get_credentials(api_key)
+        if not bgg_credentials:
+            self._send_json({'error': 'Invalid API key'}, status=401)
+            return
+
+        username, password = bgg_credentials
+        result = action(items, username, password)
+        # Only a failed BGG login reports a batch level error
+        self._send_json(result, status=401 if 'error' in result else 200)
+
+    def _json_body(self, params):
+        try:
+            body = json.loads(params.get('_raw_post_data') or '{}')
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
     def _handle_legacy_request(self, params):
         """Handle legacy requests for backward compatibility."""
         query = params.get("query")
@@ -640,6 +745,8 @@ class handler(BaseHTTPRequestHandler):
             <ul>
                 <li>GET /lookup?query=BARCODE</li>
                 <li>GET /play?query=BARCODE&api_key=YOUR_KEY</li>
+                <li>POST /delete_plays</li>
+                <li>POST /collection</li>
                 <li>POST /register</li>
             </ul>
             """
@@ -0,0 +1,108 @@
+"""A local stand-in for the BGG XML API serving benchmarks.fixtures responses.
+
+Point the client at it with BGG_XMLAPI_URL (set before importing
+game_scanner). The collection of ``username`` has ``collection_size`` games.
+
+* ``latency_s``        - delay before every response
+* ``queued_responses`` - 202s returned per username before its collection is ready
+* ``throttle_every``   - answer every Nth request with 429 (0 disables)
+* ``inline_stats``     - include <stats> in collections, as with stats=1
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.fixtures import FIRST_GAME_ID, collection_xml_chunks, thing_xml
+
+
+class BGGStubServer:
+    def __init__(self, collection_size, latency_s=0.0, queued_responses=0, throttle_every=0, inline_stats=True):
+        self.collection_size = collection_size
+        self.latency_s = latency_s
+        self.queued_responses = queued_responses
+        self.throttle_every = throttle_every
+        self.inline_stats = inline_stats
+        self.requests = Counter()
+        self.statuses = Counter()
+        self._queued = Counter()
+        self._lock = threading.Lock()
+        self._server = _QuietServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/xmlapi2"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self._queued.clear()
+
+    def respond(self, path, params):
+        """Return (status, body chunks) for a request and count it."""
+        endpoint = path.rsplit("/", 1)[-1]
+        with self._lock:
+            self.requests[endpoint] += 1
+            total = sum(self.requests.values())
+            if self.throttle_every and total % self.throttle_every == 0:
+                self.statuses[429] += 1
+                return 429, [b"<error><message>Rate limit exceeded.</message></error>"]
+            if endpoint == "collection":
+                username = params.get("username", [""])[0]
+                if self._queued[username] < self.queued_responses:
+                    self._queued[username] += 1
+                    self.statuses[202] += 1
+                    return 202, [b"<message>Your request for this collection has been accepted.</message>"]
+
+        if endpoint == "collection":
+            return 200, collection_xml_chunks(self.collection_size, inline_stats=self.inline_stats)
+        if endpoint == "thing":
+            ids = [int(game_id) for game_id in params["id"][0].split(",")]
+            known = [game_id for game_id in ids if FIRST_GAME_ID <= game_id < FIRST_GAME_ID + self.collection_size]
+            return 200, [thing_xml(known)]
+        return 404, [b""]
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # The client closes 202/429 responses without reading them
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def _handler(stub):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if stub.latency_s:
+                time.sleep(stub.latency_s)
+            url = urlparse(self.path)
+            status, chunks = stub.respond(url.path, parse_qs(url.query))
+            self.send_response(status)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
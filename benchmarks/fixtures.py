@@ -0,0 +1,81 @@
+"""Synthetic BGG XML API responses for benchmarks.
+
+Responses are generated lazily in chunks so a benchmark only holds what the
+code under test holds. Game ids start at FIRST_GAME_ID and every attribute is
+derived from the id, so collection and thing responses agree with each other.
+"""
+import random
+
+COLLECTION_SIZES = (100, 1000, 10000)
+FIRST_GAME_ID = 100000
+
+
+def game_attributes(bgg_id, seed=0):
+    """Deterministic fake game: (name, min_players, max_players, playtime, weight)."""
+    rng = random.Random(seed * 1_000_003 + bgg_id)
+    min_players = rng.randint(1, 4)
+    return (
+        f"Synthetic Game {bgg_id - FIRST_GAME_ID}",
+        min_players,
+        min_players + rng.randint(0, 4),
+        rng.choice((15, 30, 45, 60, 90, 120, 180)),
+        round(rng.uniform(1, 5), 4),
+    )
+
+
+def collection_items(count, seed=0):
+    """Deterministic fake collection entries: (bgg_id, name, min_players, max_players, playtime)."""
+    for bgg_id in range(FIRST_GAME_ID, FIRST_GAME_ID + count):
+        name, min_players, max_players, playtime, _ = game_attributes(bgg_id, seed)
+        yield bgg_id, name, min_players, max_players, playtime
+
+
+def collection_xml_chunks(count, items_per_chunk=200, seed=0, inline_stats=True):
+    """A collection response; inline_stats=False mimics a request without stats=1."""
+    yield f'<?xml version="1.0" encoding="utf-8"?><items totalitems="{count}" pubdate="">'.encode()
+    buffer = []
+    for bgg_id, name, min_players, max_players, playtime in collection_items(count, seed):
+        stats = (
+            f'<stats minplayers="{min_players}" maxplayers="{max_players}" minplaytime="{playtime}" '
+            f'maxplaytime="{playtime}" playingtime="{playtime}" numowned="100"><rating value="N/A"/></stats>'
+            if inline_stats
+            else ""
+        )
+        buffer.append(
+            f'<item objecttype="thing" objectid="{bgg_id}" subtype="boardgame" collid="{bgg_id}">'
+            f'<name sortindex="1">{name}</name><yearpublished>2020</yearpublished>{stats}'
+            f'<status own="1" prevowned="0" fortrade="0" want="0" wanttoplay="0" '
+            f'wanttobuy="0" wishlist="0" preordered="0" lastmodified="2024-01-01 00:00:00"/>'
+            f"<numplays>0</numplays></item>"
+        )
+        if len(buffer) >= items_per_chunk:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+    yield b"</items>"
+
+
+def collection_xml(count, seed=0, inline_stats=True):
+    return b"".join(collection_xml_chunks(count, seed=seed, inline_stats=inline_stats))
+
+
+def thing_xml(game_ids, seed=0):
+    """A thing response with stats and the player count poll for the given ids."""
+    items = []
+    for bgg_id in game_ids:
+        name, min_players, max_players, playtime, weight = game_attributes(bgg_id, seed)
+        poll = "".join(
+            f'<results numplayers="{n}"><result value="Best" numvotes="{5 if n == max_players else 1}"/>'
+            f'<result value="Recommended" numvotes="3"/><result value="Not Recommended" numvotes="1"/></results>'
+            for n in range(min_players, max_players + 1)
+        )
+        items.append(
+            f'<item type="boardgame" id="{bgg_id}"><name type="primary" sortindex="1" value="{name}"/>'
+            f'<yearpublished value="2020"/><minplayers value="{min_players}"/>'
+            f'<maxplayers value="{max_players}"/><playingtime value="{playtime}"/>'
+            f'<minplaytime value="{playtime}"/><maxplaytime value="{playtime}"/>'
+            f'<poll name="suggested_numplayers" title="User Suggested Number of Players" totalvotes="9">{poll}</poll>'
+            f'<statistics page="1"><ratings><averageweight value="{weight}"/></ratings></statistics></item>'
+        )
+    return f'<?xml version="1.0" encoding="utf-8"?><items>{"".join(items)}</items>'.encode()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Wall time, BGG request count and peak memory of listing a large collection.
+
+Runs against benchmarks.bgg_stub_server, so no real BGG traffic is made, and
+with Firestore replaced by empty stand-ins so only BGG traffic is measured.
+Every scenario starts from empty in-process caches unless noted:
+
+* ``filter``         - filter_games_by_playercount, the direct uncached path
+* ``index_cold``     - get_my_games(player_count) building snapshot and index
+* ``index_cached``   - the same call again, answered from the cached snapshot
+* ``weight_cold``    - get_my_games with a weight filter, which needs thing lookups
+* ``weight_cached``  - the same call again
+
+    python benchmarks/list_my_games_benchmark.py --sizes 100 1000 --latency-ms 50
+    python benchmarks/list_my_games_benchmark.py --no-inline-stats --throttle-every 25
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bgg_stub_server import BGGStubServer  # noqa: E402
+from benchmarks.fixtures import COLLECTION_SIZES  # noqa: E402
+
+USERNAME = "benchmark"
+PLAYER_COUNT = 3
+
+
+def scenarios(list_my_games):
+    by_count = lambda: list_my_games.get_my_games(PLAYER_COUNT, username=USERNAME)  # noqa: E731
+    by_weight = lambda: list_my_games.get_my_games(PLAYER_COUNT, username=USERNAME, max_weight=2.5)  # noqa: E731
+    return (
+        ("filter", True, lambda: list_my_games.filter_games_by_playercount(USERNAME, PLAYER_COUNT)),
+        ("index_cold", True, by_count),
+        ("index_cached", False, by_count),
+        ("weight_cold", True, by_weight),
+        ("weight_cached", False, by_weight),
+    )
+
+
+def reset_caches():
+    from game_scanner import bgg_client, game_metadata, list_my_games, player_count_index
+
+    # A new client starts without cached responses
+    bgg_client._client = None
+    list_my_games._snapshots.clear()
+    player_count_index._indexes.clear()
+    game_metadata._memory_cache.clear()
+
+
+def measure(stub, run):
+    stub.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    games = run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, sum(stub.requests.values()), stub.statuses, peak, len(games)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(COLLECTION_SIZES))
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--queued", type=int, default=0, help="202 responses before each collection is ready")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth request with 429")
+    parser.add_argument("--no-inline-stats", action="store_true", help="serve collections without <stats>")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    import structlog
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"{'scenario':<15}{'games':>7}{'time ms':>10}{'requests':>10}{'202/429':>9}{'peak MiB':>10}{'matched':>9}")
+    for size in args.sizes:
+        stub = BGGStubServer(
+            size,
+            latency_s=args.latency_ms / 1000,
+            queued_responses=args.queued,
+            throttle_every=args.throttle_every,
+            inline_stats=not args.no_inline_stats,
+        )
+        with stub:
+            # The client reads the base URL at import time
+            os.environ["BGG_XMLAPI_URL"] = stub.url
+            for module in [name for name in sys.modules if name.startswith("game_scanner")]:
+                del sys.modules[module]
+            from game_scanner import game_metadata, list_my_games
+
+            store = MagicMock()
+            store.document.return_value.get.return_value.exists = False
+            with patch.object(game_metadata, "_memory_cache", OrderedDict()), patch(
+                "game_scanner.game_metadata.get_documents", return_value={}
+            ), patch("game_scanner.game_metadata.save_documents"), patch(
+                "game_scanner.player_count_index.get_collection", return_value=store
+            ):
+                for name, cold, run in scenarios(list_my_games):
+                    if cold:
+                        reset_caches()
+                    elapsed, requests, statuses, peak, matched = measure(stub, run)
+                    print(
+                        f"{name:<15}{size:>7}{elapsed * 1000:>10.1f}{requests:>10}"
+                        f"{f'{statuses[202]}/{statuses[429]}':>9}{peak / 2**20:>10.2f}{matched:>9}"
+                    )
+
+
+if __name__ == "__main__":
+    main()
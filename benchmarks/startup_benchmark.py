@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Measure cold-start cost of the Firestore client.
+
+Every scenario runs in a fresh interpreter so nothing is shared between runs:
+
+* ``import_db``        - importing game_scanner.db (firebase_admin is deferred)
+* ``import_firebase``  - importing firebase_admin + firestore, i.e. what the
+                         module import used to cost before it was deferred
+* ``first_request``    - time until the first get_db_connection() returns
+* ``first_request_prewarmed`` - same, but prewarm_db_connection() is started
+                         at import time and the request spends ``--parse-ms``
+                         parsing before it needs the client
+
+The two request scenarios need FIRESTORE_KEY and are skipped without it.
+
+    python benchmarks/startup_benchmark.py --runs 5 --parse-ms 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import_db": """
+import time
+t0 = time.perf_counter()
+import game_scanner.db
+print(time.perf_counter() - t0)
+""",
+    "import_firebase": """
+import time
+t0 = time.perf_counter()
+import firebase_admin
+from firebase_admin import credentials, firestore
+print(time.perf_counter() - t0)
+""",
+    "first_request": """
+import time
+t0 = time.perf_counter()
+from game_scanner import db
+time.sleep({parse_s})
+db.get_db_connection()._firestore_api
+print(time.perf_counter() - t0)
+""",
+    "first_request_prewarmed": """
+import time
+t0 = time.perf_counter()
+from game_scanner import db
+db.prewarm_db_connection()
+time.sleep({parse_s})
+db.get_db_connection()._firestore_api
+print(time.perf_counter() - t0)
+""",
+}
+
+NEEDS_FIRESTORE = {"first_request", "first_request_prewarmed"}
+
+
+def run_scenario(code, parse_ms):
+    result = subprocess.run(
+        [sys.executable, "-c", code.format(parse_s=parse_ms / 1000)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--parse-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    has_key = bool(os.environ.get("FIRESTORE_KEY"))
+    print(f"{'scenario':<26}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, code in SCENARIOS.items():
+        if name in NEEDS_FIRESTORE and not has_key:
+            print(f"{name:<26}{'skipped (no FIRESTORE_KEY)':>32}")
+            continue
+        timings = [run_scenario(code, args.parse_ms) * 1000 for _ in range(args.runs)]
+        print(
+            f"{name:<26}{statistics.median(timings):>12.1f}"
+            f"{min(timings):>10.1f}{max(timings):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
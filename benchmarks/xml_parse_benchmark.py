@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Peak memory and time of parsing a collection response, buffered vs streamed.
+
+``buffered`` mirrors the old path: join the whole payload (response.content)
+and build the full tree with ET.fromstring. ``streamed`` feeds the chunks to
+game_scanner.bgg_xml as they arrive.
+
+    python benchmarks/xml_parse_benchmark.py --items 10000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import collection_xml_chunks  # noqa: E402
+from game_scanner.bgg_xml import iter_elements, parse_collection_item  # noqa: E402
+
+
+def buffered(chunks):
+    root = ET.fromstring(b"".join(chunks))
+    return [parse_collection_item(item) for item in root.findall("item")]
+
+
+def streamed(chunks):
+    return [parse_collection_item(item) for item in iter_elements(chunks, "item")]
+
+
+def measure(parse, items):
+    tracemalloc.start()
+    started = time.perf_counter()
+    games = parse(collection_xml_chunks(items))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(games) == items
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'parser':<10}{'items':>8}{'time ms':>10}{'peak MiB':>10}")
+    for name, parse in (("buffered", buffered), ("streamed", streamed)):
+        elapsed, peak = measure(parse, args.items)
+        print(f"{name:<10}{args.items:>8}{elapsed * 1000:>10.1f}{peak / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,36 @@
 #!/usr/bin/env python3
 
-import json
-from game_scanner.db import get_collection
+import argparse
 
-def dump_games_collection():
-    """Dump the entire Firestore games collection to JSON"""
-    collection = get_collection("games")
-    games = []
+from game_scanner.analytics_store import DEFAULT_STORE_PATH, WATERMARK_FIELDS, sync_collection
+from game_scanner.firestore_export import export_collection
 
-    docs = collection.stream()
-    for doc in docs:
-        game_data = doc.to_dict()
-        game_data['doc_id'] = doc.id  # Include document ID
-        games.append(game_data)
 
-    return games
+def dump_games_collection(output_path="games_collection.ndjson", partitions=4, resume=True):
+    """Stream the Firestore games collection to NDJSON"""
+    return export_collection("games", output_path, partitions=partitions, resume=resume)
 
-if __name__ == "__main__":
-    games = dump_games_collection()
 
-    with open("games_collection.json", "w") as f:
-        json.dump(games, f, indent=2, default=str)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a Firestore collection to NDJSON")
+    parser.add_argument("--collection", default="games", help="games, lookup_traces, users, ...")
+    parser.add_argument("--output", help="output file, gzip-compressed if it ends with .gz")
+    parser.add_argument("--partitions", type=int, default=4, help="number of parallel readers")
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint")
+    parser.add_argument(
+        "--incremental", action="store_true", help="only fetch documents newer than the last sync"
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="local store for --incremental")
+    args = parser.parse_args()
 
-    print(f"Dumped {len(games)} games to games_collection.json")
\ No newline at end of file
+    if args.incremental:
+        if args.collection not in WATERMARK_FIELDS:
+            parser.error(f"--incremental supports {', '.join(WATERMARK_FIELDS)}, not {args.collection}")
+        count = sync_collection(args.collection, store_path=args.store)
+        print(f"Synced {count} new {args.collection} documents to {args.store}")
+    else:
+        output = args.output or f"{args.collection}_collection.ndjson"
+        count = export_collection(
+            args.collection, output, partitions=args.partitions, resume=not args.no_resume
+        )
+        print(f"Dumped {count} {args.collection} documents to {output}")
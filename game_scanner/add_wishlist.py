@@ -1,11 +1,17 @@
 import json
 import os
 
-import requests
 import structlog
 
+from game_scanner import player_count_index
+from game_scanner.bgg_session import bgg_post, ensure_logged_in
+from game_scanner.list_my_games import mark_collection_changed
+
 logger = structlog.get_logger()
 
+# BGG collection statuses a game can be given by name
+COLLECTION_STATUSES = ("own", "prevowned", "fortrade", "want", "wanttoplay", "wanttobuy", "wishlist", "preordered")
+
 
 def add_to_collection(game_id: str, status_config: dict, collection_type: str, username=None, password=None):
     """
@@ -24,8 +30,63 @@ def add_to_collection(game_id: str, status_config: dict, collection_type: str, u
 
     logger.info("adding game to collection", game_id=game_id, collection_type=collection_type, username=username)
 
-    login_payload = {"credentials": {"username": username, "password": password}}
+    try:
+        collection_response = _post_collection_item(game_id, status_config, username, password)
+    except ValueError as e:
+        return f"Failed to add game {game_id}: {e}"
+
+    if collection_response.status_code == 200:
+        _collection_changed(username, game_id, status_config)
+
+    success_msg = f"Successfully added game {game_id} to {username}'s {collection_type}"
+    logger.info("added game to collection", game_id=game_id, collection_type=collection_type, username=username)
+    return success_msg if collection_response.status_code == 200 else f"Failed to add game {game_id}: {collection_response.text}"
+
+
+def add_games_to_collection(items, username=None, password=None):
+    """
+    Set the collection status of several games over one BGG login.
 
+    Each item has a game_id and a status, either one of COLLECTION_STATUSES
+    or a status config like in add_to_collection. Games are posted one at a
+    time over the user's logged-in session. Returns the number of updated
+    and failed games and the outcome of each.
+    """
+    username = username or os.environ["BGG_USERNAME"]
+    password = password or os.environ["BGG_PASS"]
+    try:
+        ensure_logged_in(username, password)
+    except ValueError as e:
+        return {"updated": 0, "failed": len(items), "error": str(e)}
+
+    def update(item):
+        game_id = str(item["game_id"])
+        try:
+            status_config = _status_config(item["status"])
+            response = _post_collection_item(game_id, status_config, username, password)
+        except Exception as e:
+            return {"game_id": game_id, "status": "failed", "error": str(e)}
+        if response.status_code != 200:
+            return {"game_id": game_id, "status": "failed", "error": response.text}
+        _collection_changed(username, game_id, status_config)
+        return {"game_id": game_id, "status": "updated"}
+
+    outcomes = [update(item) for item in items]
+
+    updated = sum(outcome["status"] == "updated" for outcome in outcomes)
+    logger.info("updated collection batch", username=username, updated=updated, games=len(items))
+    return {"updated": updated, "failed": len(items) - updated, "games": outcomes}
+
+
+def _status_config(status):
+    if isinstance(status, dict):
+        return status
+    if status not in COLLECTION_STATUSES:
+        raise ValueError(f"Unknown collection status {status}, expected one of {', '.join(COLLECTION_STATUSES)}")
+    return {status: True}
+
+
+def _post_collection_item(game_id, status_config, username, password):
     # Base collection item payload
     collection_payload = {
         "item": {
@@ -41,23 +102,23 @@ def add_to_collection(game_id: str, status_config: dict, collection_type: str, u
         collection_payload["item"]["wishlistpriority"] = 3
 
     headers = {"content-type": "application/json"}
+    return bgg_post(
+        "https://boardgamegeek.com/api/collectionitems",
+        username,
+        password,
+        data=json.dumps(collection_payload),
+        headers=headers,
+    )
 
-    with requests.Session() as s:
-        s.post(
-            "https://boardgamegeek.com/login/api/v1",
-            data=json.dumps(login_payload),
-            headers=headers,
-        )
-
-        collection_response = s.post(
-            "https://boardgamegeek.com/api/collectionitems",
-            data=json.dumps(collection_payload),
-            headers=headers,
-        )
 
-    success_msg = f"Successfully added game {game_id} to {username}'s {collection_type}"
-    logger.info("added game to collection", game_id=game_id, collection_type=collection_type, username=username)
-    return success_msg if collection_response.status_code == 200 else f"Failed to add game {game_id}: {collection_response.text}"
+def _collection_changed(username, game_id, status_config):
+    if not status_config.get("own"):
+        return
+    try:
+        player_count_index.add_game(username, game_id)
+        mark_collection_changed(username)
+    except Exception as e:
+        logger.warning("failed to update player count index", error=str(e))
 
 
 def add_wishlist(game_id: str, username=None, password=None):
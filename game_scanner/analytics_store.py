@@ -0,0 +1,168 @@
+import json
+import sqlite3
+from datetime import datetime
+
+import structlog
+
+from game_scanner.db import get_collection
+from game_scanner.firestore_export import serialize_document
+
+logger = structlog.get_logger()
+
+# Field used as the incremental watermark for each collection
+WATERMARK_FIELDS = {
+    "games": "added_at",
+    "lookup_traces": "timestamp",
+}
+
+# Document fields that get an expression index in the local store
+INDEXED_FIELDS = {
+    "games": ("query", "bgg_id"),
+    "lookup_traces": ("query", "game_id"),
+}
+
+DEFAULT_STORE_PATH = "analytics.sqlite3"
+BATCH_SIZE = 500
+
+
+def open_store(path=DEFAULT_STORE_PATH):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            collection TEXT NOT NULL,
+            doc_id TEXT NOT NULL,
+            ts TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (collection, doc_id)
+        );
+        CREATE INDEX IF NOT EXISTS documents_ts ON documents (collection, ts);
+        CREATE TABLE IF NOT EXISTS watermarks (
+            collection TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            kind TEXT NOT NULL
+        );
+        """
+    )
+    for collection_name, fields in INDEXED_FIELDS.items():
+        for field in fields:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS documents_{collection_name}_{field} "
+                f"ON documents (collection, {_json_field(field)})"
+            )
+    return conn
+
+
+def sync_collection(collection_name, store_path=DEFAULT_STORE_PATH):
+    """
+    Fetch documents newer than the stored watermark into the local store.
+
+    Documents at exactly the watermark are fetched again and upserted by
+    doc_id, so writes sharing a timestamp are never skipped. Documents
+    without the watermark field are not synced.
+
+    Returns the number of documents fetched. Only collections listed in
+    WATERMARK_FIELDS can be synced.
+    """
+    if collection_name not in WATERMARK_FIELDS:
+        raise ValueError(
+            f"Collection {collection_name} has no watermark field, "
+            f"incremental sync supports {', '.join(WATERMARK_FIELDS)}"
+        )
+    field = WATERMARK_FIELDS[collection_name]
+    conn = open_store(store_path)
+    try:
+        watermark = _get_watermark(conn, collection_name)
+        query = get_collection(collection_name)
+        if watermark is not None:
+            query = query.where(field, ">=", watermark)
+        docs = query.order_by(field).stream()
+
+        fetched = 0
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= BATCH_SIZE:
+                _store_batch(conn, collection_name, field, batch)
+                fetched += len(batch)
+                batch = []
+        if batch:
+            _store_batch(conn, collection_name, field, batch)
+            fetched += len(batch)
+    finally:
+        conn.close()
+
+    logger.info("synced collection", collection_name=collection_name, fetched=fetched, since=str(watermark))
+    return fetched
+
+
+def query_documents(
+    collection_name,
+    since=None,
+    until=None,
+    where=None,
+    limit=None,
+    store_path=DEFAULT_STORE_PATH,
+):
+    """Query the local copy, newest first. `where` maps document fields to values."""
+    clauses = ["collection = ?"]
+    params = [collection_name]
+    if since is not None:
+        clauses.append("ts >= ?")
+        params.append(_to_text(since)[0])
+    if until is not None:
+        clauses.append("ts < ?")
+        params.append(_to_text(until)[0])
+    for field, value in (where or {}).items():
+        clauses.append(f"{_json_field(field)} = ?")
+        params.append(value)
+    sql = f"SELECT data FROM documents WHERE {' AND '.join(clauses)} ORDER BY ts DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    conn = open_store(store_path)
+    try:
+        return [json.loads(row[0]) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def _store_batch(conn, collection_name, field, docs):
+    rows = []
+    for doc in docs:
+        ts, _ = _to_text(doc.get(field))
+        rows.append((collection_name, doc.id, ts, serialize_document(collection_name, doc)))
+    value, kind = _to_text(docs[-1].get(field))
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO documents (collection, doc_id, ts, data) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO watermarks (collection, value, kind) VALUES (?, ?, ?)",
+            (collection_name, value, kind),
+        )
+
+
+def _get_watermark(conn, collection_name):
+    row = conn.execute(
+        "SELECT value, kind FROM watermarks WHERE collection = ?", (collection_name,)
+    ).fetchone()
+    if row is None:
+        return None
+    value, kind = row
+    return datetime.fromisoformat(value) if kind == "datetime" else value
+
+
+def _to_text(value):
+    # Firestore compares timestamps and strings differently, so remember which one it was
+    if isinstance(value, datetime):
+        return value.isoformat(), "datetime"
+    return str(value), "string"
+
+
+def _json_field(field):
+    if not field.replace("_", "").isalnum():
+        raise ValueError(f"Invalid field name: {field}")
+    return f"json_extract(data, '$.{field}')"
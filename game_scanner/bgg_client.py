@@ -0,0 +1,239 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import requests
+import structlog
+from requests.adapters import HTTPAdapter
+
+from game_scanner.bgg_throttle import MAX_CONCURRENCY, limited_get
+from game_scanner.bgg_xml import CHUNK_SIZE, XMLAPI_URL
+
+logger = structlog.get_logger()
+
+# 202 means BGG queued the request (collections); the others are overload
+RETRY_STATUSES = (202, 429, 500, 502, 503, 504)
+MAX_ATTEMPTS = 4
+RETRY_INITIAL_S = 2
+RETRY_MAX_DELAY_S = 15
+RETRY_MAX_WAIT_S = 30
+REQUEST_TIMEOUT_S = 60
+# Bodies kept for conditional requests; large ones are not worth the memory
+CACHE_MAX_ENTRIES = 128
+CACHE_MAX_ENTRY_BYTES = 4 * 1024 * 1024
+
+
+class BGGClient:
+    """
+    The one way to call the BGG XML API.
+
+    Requests share a pooled session and the adaptive limiter, carry the API
+    token, and are retried with backoff while BGG answers 202/429/5xx.
+    Responses with an ETag or Last-Modified are cached and revalidated with
+    conditional requests, so an unchanged resource comes back as a 304
+    without a body. Every call is counted per endpoint.
+    """
+
+    def __init__(self, base_url=XMLAPI_URL, cache_entries=CACHE_MAX_ENTRIES):
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY * 2)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, params, user=None, max_attempts=MAX_ATTEMPTS, max_wait_s=RETRY_MAX_WAIT_S):
+        """
+        GET an XML API endpoint and return a streamed response.
+
+        Retries stop after max_attempts (None for no limit) or once max_wait_s
+        were spent waiting; the last response is then returned as is, so
+        callers still see the 202 or 5xx. Connection errors are raised.
+        """
+        url = f"{self.base_url}/{endpoint}?{urlencode(params, safe=',')}"
+        headers = {"Accept": "application/xml"}
+        bgg_api_key = os.environ.get("BGG_API_KEY")
+        if bgg_api_key:
+            headers["Authorization"] = f"Bearer {bgg_api_key}"
+        with self._lock:
+            cached = self._cache.get(url)
+        if cached is not None:
+            if cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            sent = time.monotonic()
+            try:
+                response = limited_get(
+                    url, user=user, session=self.session, headers=headers, stream=True, timeout=REQUEST_TIMEOUT_S
+                )
+            except requests.RequestException as e:
+                self._record(endpoint, "error", time.monotonic() - sent)
+                delay = self._retry_delay(attempt, started, max_attempts, max_wait_s)
+                if delay is None:
+                    raise
+                logger.warning("bgg request failed, retrying", endpoint=endpoint, attempt=attempt, error=str(e))
+                time.sleep(delay)
+                continue
+
+            self._record(endpoint, response.status_code, time.monotonic() - sent)
+            if response.status_code == 304 and cached is not None:
+                response.close()
+                with self._lock:
+                    self._cache.move_to_end(url)
+                return CachedResponse(cached)
+            if response.status_code in RETRY_STATUSES:
+                delay = self._retry_delay(attempt, started, max_attempts, max_wait_s, response)
+                if delay is None:
+                    return response
+                response.close()
+                logger.info(
+                    "bgg request retried", endpoint=endpoint, status_code=response.status_code, attempt=attempt,
+                    retry_in=round(delay, 1),
+                )
+                time.sleep(delay)
+                continue
+            if response.status_code == 200 and _validators(response) != (None, None):
+                return CachingResponse(response, lambda content: self._store(url, response, content))
+            return response
+
+    def stats(self):
+        """Requests, retries, 304s and latency of each endpoint."""
+        with self._lock:
+            metrics = {endpoint: dict(counts) for endpoint, counts in self._metrics.items()}
+            cached = len(self._cache)
+        for counts in metrics.values():
+            latency_s = counts.pop("latency_s")
+            counts["mean_latency_s"] = round(latency_s / counts["requests"], 3) if counts["requests"] else None
+        return {"endpoints": metrics, "cached_responses": cached}
+
+    def _retry_delay(self, attempt, started, max_attempts, max_wait_s, response=None):
+        if max_attempts is not None and attempt >= max_attempts:
+            return None
+        remaining = max_wait_s - (time.monotonic() - started)
+        if remaining <= 0:
+            return None
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if isinstance(retry_after, str) and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = min(RETRY_INITIAL_S * 2 ** (attempt - 1), RETRY_MAX_DELAY_S) * random.uniform(0.5, 1.0)
+        return min(delay, remaining)
+
+    def _record(self, endpoint, status, latency_s):
+        with self._lock:
+            counts = self._metrics.setdefault(
+                endpoint, {"requests": 0, "retried": 0, "not_modified": 0, "errors": 0, "statuses": {}, "latency_s": 0.0}
+            )
+            counts["requests"] += 1
+            counts["latency_s"] += latency_s
+            if status == "error":
+                counts["errors"] += 1
+            else:
+                counts["statuses"][status] = counts["statuses"].get(status, 0) + 1
+                if status == 304:
+                    counts["not_modified"] += 1
+            if status == "error" or status in RETRY_STATUSES:
+                counts["retried"] += 1
+
+    def _store(self, url, response, content):
+        etag, last_modified = _validators(response)
+        with self._lock:
+            self._cache[url] = {"content": content, "etag": etag, "last_modified": last_modified}
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+
+class CachedResponse:
+    """A cached 200 standing in for the body a 304 left out."""
+
+    status_code = 200
+
+    def __init__(self, entry):
+        self.content = entry["content"]
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CachingResponse:
+    """A streamed response whose body is cached once the caller has read all of it."""
+
+    def __init__(self, response, on_complete):
+        self._response = response
+        self._on_complete = on_complete
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        chunks = []
+        size = 0
+        for chunk in self._response.iter_content(chunk_size=chunk_size):
+            size += len(chunk)
+            if chunks is not None and size > CACHE_MAX_ENTRY_BYTES:
+                # Too large to cache, so stop holding on to it
+                chunks = None
+            if chunks is not None:
+                chunks.append(chunk)
+            yield chunk
+        # Callers that stop early (e.g. after last_n plays) leave nothing cached
+        if chunks is not None:
+            self._on_complete(b"".join(chunks))
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._response.close()
+
+
+def _validators(response):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    return (
+        etag if isinstance(etag, str) else None,
+        last_modified if isinstance(last_modified, str) else None,
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide BGGClient, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BGGClient()
+        return _client
+
+
+def get_client_stats():
+    return get_client().stats()
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import cloudscraper
+import structlog
+
+from game_scanner.errors import BGGLoginError
+
+logger = structlog.get_logger()
+
+LOGIN_URL = "https://boardgamegeek.com/login/api/v1"
+# Logged-in sessions unused for this long are dropped, and at most
+# MAX_SESSIONS users keep one (least recently used go first)
+SESSION_IDLE_TTL_S = 30 * 60
+MAX_SESSIONS = 100
+
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+class _UserSession:
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        self.session = cloudscraper.create_scraper()
+        self.generation = 0
+        self.last_used = time.monotonic()
+        # Held for each login and POST: the cloudscraper session is not thread-safe
+        self.lock = threading.RLock()
+
+    def login(self, expired_generation=None):
+        """Log in unless another caller already did since expired_generation."""
+        with self.lock:
+            if self.generation and self.generation != expired_generation:
+                return self.generation
+            login_payload = {"credentials": {"username": self.username, "password": self.password}}
+            response = self.session.post(LOGIN_URL, json=login_payload)
+            if not response.ok:
+                raise BGGLoginError(self.username, response.status_code, response.text)
+            self.generation += 1
+            logger.info("logged in to BGG", username=self.username, relogin=expired_generation is not None)
+            return self.generation
+
+
+def bgg_post(url, username, password, **kwargs):
+    """
+    POST to boardgamegeek.com as the given user.
+
+    The logged-in session of each user is cached, so consecutive actions
+    reuse its cookies instead of logging in again. When BGG answers as if
+    the login expired, the user is logged in again and the POST retried once.
+    POSTs of one user are sent one at a time, so batches run in turn too.
+    """
+    user_session = _get_user_session(username, password)
+    try:
+        with user_session.lock:
+            generation = user_session.generation or user_session.login()
+            response = user_session.session.post(url, **kwargs)
+            if _login_expired(response):
+                logger.info("BGG login expired", username=username)
+                user_session.login(expired_generation=generation)
+                response = user_session.session.post(url, **kwargs)
+    except BGGLoginError:
+        _drop_user_session(username, password)
+        raise
+    return response
+
+
+def ensure_logged_in(username, password):
+    """Log the user in now unless a cached session already is; raises BGGLoginError on failure."""
+    user_session = _get_user_session(username, password)
+    try:
+        if not user_session.generation:
+            user_session.login()
+    except BGGLoginError:
+        _drop_user_session(username, password)
+        raise
+
+
+def _get_user_session(username, password):
+    key = _session_key(username, password)
+    now = time.monotonic()
+    evicted = []
+    with _sessions_lock:
+        for other_key, other in list(_sessions.items()):
+            if now - other.last_used > SESSION_IDLE_TTL_S:
+                evicted.append(_sessions.pop(other_key))
+        user_session = _sessions.get(key)
+        if user_session is None:
+            user_session = _UserSession(username, password)
+            _sessions[key] = user_session
+        _sessions.move_to_end(key)
+        user_session.last_used = now
+        while len(_sessions) > MAX_SESSIONS:
+            evicted.append(_sessions.popitem(last=False)[1])
+    for other in evicted:
+        other.session.close()
+    return user_session
+
+
+def _drop_user_session(username, password):
+    with _sessions_lock:
+        user_session = _sessions.pop(_session_key(username, password), None)
+    if user_session is not None:
+        user_session.session.close()
+
+
+def _session_key(username, password):
+    # A changed password gets a fresh session rather than the old cookies
+    return username.lower(), hashlib.sha256(password.encode()).hexdigest()
+
+
+def _login_expired(response):
+    if response.status_code in (401, 403):
+        return True
+    if "json" not in response.headers.get("content-type", ""):
+        return False
+    try:
+        error = response.json().get("error", "")
+    except (ValueError, AttributeError):
+        return False
+    return isinstance(error, str) and "login" in error.lower()
@@ -0,0 +1,163 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import requests
+import structlog
+
+logger = structlog.get_logger()
+
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = int(os.environ.get("BGG_MAX_CONCURRENCY", 8))
+# Responses slower than this are treated as a sign that BGG is overloaded
+LATENCY_TARGET_S = float(os.environ.get("BGG_LATENCY_TARGET_S", 3.0))
+# Decrease at most once per window so a burst of 429s only halves the limit once
+DECREASE_COOLDOWN_S = 1.0
+THROTTLE_EVENTS_KEPT = 100
+
+
+class AdaptiveLimiter:
+    """
+    Process-wide AIMD concurrency limit with round-robin fairness across users.
+
+    Each user has a FIFO of waiting callers; free slots are handed to users in
+    turn, so one user's large collection cannot starve everyone else. The
+    limit grows by about one slot per window of successful responses and is
+    halved on 429/5xx or responses slower than the latency target.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY,
+                 latency_target_s=LATENCY_TARGET_S):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target_s = latency_target_s
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._waiting = OrderedDict()
+        self._condition = threading.Condition()
+        self._last_decrease = 0.0
+        self._events = deque(maxlen=THROTTLE_EVENTS_KEPT)
+        self._counts = {"requests": 0, "throttled": 0, "slow": 0, "errors": 0, "waited_s": 0.0}
+
+    def acquire(self, user=None):
+        """Block until a slot is granted to this caller; returns the time spent queued."""
+        ticket = {"granted": False}
+        started = time.monotonic()
+        with self._condition:
+            self._waiting.setdefault(user, deque()).append(ticket)
+            self._dispatch()
+            while not ticket["granted"]:
+                self._condition.wait()
+            waited = time.monotonic() - started
+            self._counts["waited_s"] += waited
+        return waited
+
+    def release(self, status_code=None, latency_s=0.0):
+        """Free a slot and adapt the limit to how the request went."""
+        with self._condition:
+            self._in_flight -= 1
+            self._counts["requests"] += 1
+            if status_code is None:
+                self._counts["errors"] += 1
+            elif status_code == 429 or status_code >= 500:
+                self._counts["throttled"] += 1
+                self._decrease("throttled", status_code, latency_s)
+            elif latency_s > self.latency_target_s:
+                self._counts["slow"] += 1
+                self._decrease("slow", status_code, latency_s)
+            else:
+                self._limit = min(self._limit + 1 / self._limit, self.maximum)
+            self._dispatch()
+
+    def stats(self):
+        with self._condition:
+            return {
+                **self._counts,
+                "waited_s": round(self._counts["waited_s"], 2),
+                "limit": round(self._limit, 2),
+                "in_flight": self._in_flight,
+                "queued": sum(len(tickets) for tickets in self._waiting.values()),
+                "recent_throttle_events": list(self._events),
+            }
+
+    def _decrease(self, reason, status_code, latency_s):
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN_S:
+            return
+        self._last_decrease = now
+        self._limit = max(self._limit / 2, self.minimum)
+        event = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "reason": reason,
+            "status_code": status_code,
+            "latency_s": round(latency_s, 2),
+            "limit": round(self._limit, 2),
+        }
+        self._events.append(event)
+        logger.warning("bgg throttling, reducing concurrency", **event)
+
+    def _dispatch(self):
+        # Caller holds the condition
+        granted = False
+        while self._waiting and self._in_flight < int(self._limit):
+            user, tickets = next(iter(self._waiting.items()))
+            tickets.popleft()["granted"] = True
+            self._in_flight += 1
+            granted = True
+            del self._waiting[user]
+            if tickets:
+                self._waiting[user] = tickets
+        if granted:
+            self._condition.notify_all()
+
+
+_limiter = AdaptiveLimiter()
+_request_counters = contextvars.ContextVar("bgg_request_counters", default=())
+_request_counter_lock = threading.Lock()
+
+
+@contextmanager
+def count_requests():
+    """
+    Count the BGG requests made inside the block, nested blocks included.
+
+    Worker threads are included when they run in a copy of the caller's
+    context (contextvars.copy_context().run).
+    """
+    counter = {"requests": 0}
+    token = _request_counters.set(_request_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _request_counters.reset(token)
+
+
+def limited_get(url, user=None, session=None, **kwargs):
+    """
+    requests.get (or session.get) for the BGG XML API, run under the shared limiter.
+
+    The slot is held until the response headers arrive, which is when BGG
+    has done the work the limit is protecting.
+    """
+    with _request_counter_lock:
+        for counter in _request_counters.get():
+            counter["requests"] += 1
+    _limiter.acquire(user)
+    started = time.monotonic()
+    try:
+        response = (session or requests).get(url, **kwargs)
+    except Exception:
+        _limiter.release(None, time.monotonic() - started)
+        raise
+    _limiter.release(response.status_code, time.monotonic() - started)
+    return response
+
+
+def get_throttle_stats():
+    """Limit, queue depth and recent throttle events of the BGG limiter."""
+    return _limiter.stats()
@@ -0,0 +1,70 @@
+import os
+import xml.etree.ElementTree as ET
+
+# Overridable so benchmarks can point the client at a local stand-in server
+XMLAPI_URL = os.environ.get("BGG_XMLAPI_URL", "https://boardgamegeek.com/xmlapi2")
+CHUNK_SIZE = 64 * 1024
+
+# Attributes of the <stats> element a collection returns with stats=1
+COLLECTION_STATS_FIELDS = {
+    "min_players": "minplayers",
+    "max_players": "maxplayers",
+    "playing_time": "playingtime",
+    "min_playtime": "minplaytime",
+    "max_playtime": "maxplaytime",
+}
+
+
+def iter_response_elements(response, tag, root_attrib=None):
+    """Stream the top-level <tag> elements of a response opened with stream=True."""
+    return iter_elements(response.iter_content(chunk_size=CHUNK_SIZE), tag, root_attrib)
+
+
+def iter_elements(chunks, tag, root_attrib=None):
+    """
+    Incrementally parse XML byte chunks and yield each top-level <tag> element.
+
+    Every element is detached from the tree once the caller moves on, so
+    memory stays bounded by one element rather than the whole document.
+    Attributes of the root element (e.g. the plays `total`) are copied into
+    root_attrib when given.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    depth = 0
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                    if root_attrib is not None:
+                        root_attrib.update(elem.attrib)
+                continue
+            depth -= 1
+            if depth == 1 and elem.tag == tag:
+                yield elem
+                root.remove(elem)
+    parser.close()
+
+
+def parse_collection_item(item):
+    """Parse a collection <item>; the stats fields are None unless requested with stats=1."""
+    name = item.find("name")
+    year = item.find("yearpublished")
+    stats = item.find("stats")
+    record = {
+        "bgg_id": item.get("objectid"),
+        "name": name.text if name is not None else None,
+        "year": _to_int(year.text if year is not None else None),
+    }
+    for field, attribute in COLLECTION_STATS_FIELDS.items():
+        record[field] = _to_int(stats.get(attribute)) if stats is not None else None
+    return record
+
+
+def _to_int(value):
+    if value is None or not value.strip().isdigit():
+        return None
+    return int(value)
@@ -0,0 +1,157 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+import structlog
+
+logger = structlog.get_logger()
+
+DISPATCH_URL = "https://api.github.com/repos/nraw/my_board_games/dispatches"
+DEFAULT_STATE_PATH = os.path.join(tempfile.gettempdir(), "my_board_games_dispatch.json")
+# Triggers closer together than DEBOUNCE_S are sent as one dispatch, but a
+# steady stream of triggers still dispatches at least every MAX_DELAY_S
+DEBOUNCE_S = float(os.environ.get("BOARD_GAMES_DISPATCH_DEBOUNCE_S", 60))
+MAX_DELAY_S = 10 * 60
+# Only connection errors, 429 and 5xx are retried, at most MAX_ATTEMPTS times
+RETRY_S = 60
+MAX_ATTEMPTS = 5
+
+_state_lock = threading.Lock()
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def request_dispatch():
+    """
+    Ask for a my_board_games rebuild; returns right away.
+
+    The trigger is written to a state file, so triggers pending when the
+    process stops are dispatched by the next one.
+    """
+    now = time.time()
+    with _state_lock:
+        state = _load_state()
+        state.setdefault("first_trigger", now)
+        state["last_trigger"] = now
+        state["triggers"] = state.get("triggers", 0) + 1
+        _save_state(state)
+    start_worker()
+    _wake.set()
+
+
+def flush_dispatch():
+    """Send the pending dispatch now; returns whether one was sent."""
+    with _state_lock:
+        state = _load_state()
+    if not state:
+        return False
+    return _dispatch(state)
+
+
+def start_worker():
+    """Start the background worker once per process; it picks up triggers left pending by the last one."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="board-games-dispatch", daemon=True)
+            _worker.start()
+        return _worker
+
+
+def _run_worker():
+    while True:
+        with _state_lock:
+            state = _load_state()
+        if not state:
+            _wake.wait()
+            _wake.clear()
+            continue
+        delay = _due_at(state) - time.time()
+        if delay > 0:
+            # A new trigger pushes the dispatch back, so look again once woken
+            _wake.wait(timeout=delay)
+            _wake.clear()
+            continue
+        _dispatch(state)
+
+
+def _due_at(state):
+    retry_at = state.get("retry_at", 0)
+    return max(min(state["last_trigger"] + DEBOUNCE_S, state["first_trigger"] + MAX_DELAY_S), retry_at)
+
+
+def _dispatch(state):
+    try:
+        github_token = os.getenv("GH_TOKEN", "")
+        headers = {
+            "contentType": "application/json",
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": "token " + github_token,
+        }
+        data = {"event_type": "webhook"}
+        r = requests.post(DISPATCH_URL, headers=headers, json=data, timeout=30)
+        r.raise_for_status()
+    except Exception as e:
+        attempts = state.get("attempts", 0) + 1
+        response = getattr(e, "response", None)
+        retryable = isinstance(e, (requests.ConnectionError, requests.Timeout)) or (
+            response is not None and (response.status_code == 429 or response.status_code >= 500)
+        )
+        if not retryable or attempts >= MAX_ATTEMPTS:
+            logger.error(
+                "failed to update my_board_games, dropping dispatch", error=str(e), triggers=state["triggers"],
+                attempts=attempts,
+            )
+            _clear_dispatched(state)
+            return False
+        logger.error("failed to update my_board_games", error=str(e), triggers=state["triggers"], attempts=attempts)
+        with _state_lock:
+            pending = _load_state()
+            if pending:
+                pending["retry_at"] = time.time() + RETRY_S
+                pending["attempts"] = attempts
+                _save_state(pending)
+        return False
+
+    logger.info("triggered update to my_board_games", status_code=r.status_code, triggers=state["triggers"])
+    _clear_dispatched(state)
+    return True
+
+
+def _clear_dispatched(state):
+    with _state_lock:
+        pending = _load_state()
+        # Triggers that arrived while dispatching wait for the next one
+        if pending.get("last_trigger", 0) > state["last_trigger"]:
+            _save_state({
+                "first_trigger": state["last_trigger"],
+                "last_trigger": pending["last_trigger"],
+                "triggers": pending["triggers"] - state["triggers"],
+            })
+        else:
+            _save_state({})
+
+
+def _state_path():
+    return os.environ.get("BOARD_GAMES_DISPATCH_STATE_PATH", DEFAULT_STATE_PATH)
+
+
+def _load_state():
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    # Written to a temporary file first, so a crash never leaves half a state file
+    path = _state_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,107 @@
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+# Player counts 1..31 fit the uint32 poll bitmasks
+MAX_POLL_PLAYERS = 31
+SORT_FIELDS = ("name", "playing_time", "weight", "year")
+
+
+class CollectionColumns:
+    """
+    A user's games as parallel NumPy arrays, one entry per game.
+
+    Unknown numbers are NaN, and the community poll is kept as bitmasks where
+    bit n is set when the game is best (or recommended) at n players.
+    """
+
+    def __init__(self, games):
+        self.ids = list(games)
+        entries = [games[game_id] for game_id in self.ids]
+        self.names = np.array([(entry.get("name") or "").lower() for entry in entries], dtype=object)
+        self.min_players = _float_column(entries, "min_players")
+        self.max_players = _float_column(entries, "max_players")
+        self.playing_time = _float_column(entries, "playing_time")
+        self.weight = _float_column(entries, "weight")
+        self.year = _float_column(entries, "year")
+        self.best = _mask_column(entries, "best_at")
+        self.recommended = _mask_column(entries, "recommended_at") | self.best
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(
+        self,
+        player_count=None,
+        max_playtime=None,
+        min_weight=None,
+        max_weight=None,
+        best_at=None,
+        recommended_at=None,
+        sort_by=None,
+        descending=False,
+        limit=None,
+    ):
+        """Return the ids of the games matching every given filter, sorted and limited."""
+        keep = np.ones(len(self), dtype=bool)
+        # NaN compares False, so games with unknown values never match a filter on them
+        if player_count is not None:
+            keep &= (self.min_players <= player_count) & (player_count <= self.max_players)
+        if max_playtime is not None:
+            keep &= self.playing_time <= max_playtime
+        if min_weight is not None:
+            keep &= self.weight >= min_weight
+        if max_weight is not None:
+            keep &= self.weight <= max_weight
+        if best_at is not None:
+            keep &= (self.best & _bit(best_at)) != 0
+        if recommended_at is not None:
+            keep &= (self.recommended & _bit(recommended_at)) != 0
+
+        rows = np.flatnonzero(keep)
+        if sort_by is not None:
+            rows = rows[self._order(rows, sort_by, descending)]
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.ids[row] for row in rows]
+
+    def _order(self, rows, sort_by, descending):
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort_by}, expected one of {', '.join(SORT_FIELDS)}")
+        if sort_by == "name":
+            order = np.argsort(self.names[rows], kind="stable")
+            return order[::-1] if descending else order
+        values = getattr(self, sort_by)[rows]
+        # Unknown values sort last in either direction
+        keys = -values if descending else values
+        return np.lexsort((keys, np.isnan(values)))
+
+
+def columns_for(index):
+    """The columns of a player count index, built once per index version."""
+    columns = index.get("columns")
+    if columns is None:
+        columns = CollectionColumns(index["games"])
+        index["columns"] = columns
+        logger.info("built collection columns", games=len(columns))
+    return columns
+
+
+def _float_column(entries, field):
+    return np.array(
+        [np.nan if entry.get(field) is None else entry[field] for entry in entries], dtype=np.float32
+    )
+
+
+def _mask_column(entries, field):
+    return np.array(
+        [sum(_bit(count) for count in entry.get(field) or () if 0 < count <= MAX_POLL_PLAYERS) for entry in entries],
+        dtype=np.uint32,
+    )
+
+
+def _bit(player_count):
+    if not 0 < player_count <= MAX_POLL_PLAYERS:
+        return 0
+    return 1 << player_count
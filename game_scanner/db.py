@@ -1,20 +1,33 @@
+import contextvars
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 
-import firebase_admin
-from firebase_admin import credentials, firestore
 import structlog
 
 logger = structlog.get_logger()
 
+# Document read to open the gRPC channel; it does not need to exist
+PREWARM_COLLECTION = "games"
+PREWARM_DOC_ID = "_prewarm"
+
 # Module-level singleton for Firestore client
 _db_client = None
+_db_client_lock = threading.Lock()
+_prewarm_thread = None
+
+# Firestore usage of the logical request running in the current context
+_current_usage = contextvars.ContextVar("firestore_usage", default=None)
+_usage_totals = {}
+_usage_lock = threading.Lock()
 
 
 def get_collection(collection_name="games"):
     db = get_db_connection()
     c = db.collection(collection_name)
-    return c
+    return _TrackedCollection(c, collection_name)
 
 
 def get_db_connection():
@@ -22,6 +35,18 @@ def get_db_connection():
     if _db_client is not None:
         return _db_client
 
+    with _db_client_lock:
+        if _db_client is None:
+            _db_client = _create_db_client()
+    return _db_client
+
+
+def _create_db_client():
+    # firebase_admin pulls in the whole google-cloud stack, so it is only
+    # imported once a request actually needs Firestore.
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     firestore_key = os.environ.get("FIRESTORE_KEY")
     if not firestore_key:
         raise ValueError("FIRESTORE_KEY environment variable is required")
@@ -33,8 +58,33 @@ def get_db_connection():
     except ValueError:
         pass
 
-    _db_client = firestore.client()
-    return _db_client
+    return firestore.client()
+
+
+def prewarm_db_connection():
+    """
+    Connect to Firestore in the background so the first request finds it ready.
+
+    gRPC channels connect on their first call, so the warm-up reads one
+    (missing) document, which is billed as one read.
+    """
+    global _prewarm_thread
+    if _db_client is not None or _prewarm_thread is not None:
+        return _prewarm_thread
+    _prewarm_thread = threading.Thread(target=_prewarm, daemon=True)
+    _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def _prewarm():
+    try:
+        db = get_db_connection()
+        started = time.perf_counter()
+        db.collection(PREWARM_COLLECTION).document(PREWARM_DOC_ID).get()
+        _record(PREWARM_COLLECTION, reads=1, started=started)
+        logger.info("prewarmed firestore connection")
+    except Exception as e:
+        logger.warning("firestore prewarm failed", error=str(e))
 
 
 def save_document(data, collection_name="games"):
@@ -43,12 +93,43 @@ def save_document(data, collection_name="games"):
     logger.info("saved document", data=data)
 
 
+def get_documents(doc_ids, collection_name):
+    """Read many documents by id in one round trip. Missing ids are left out."""
+    doc_ids = [str(doc_id) for doc_id in doc_ids]
+    if not doc_ids:
+        return {}
+    db = get_db_connection()
+    c = db.collection(collection_name)
+    started = time.perf_counter()
+    snapshots = db.get_all([c.document(doc_id) for doc_id in doc_ids])
+    docs = {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+    _record(collection_name, reads=len(doc_ids), started=started)
+    return docs
+
+
+def save_documents(docs_by_id, collection_name, merge=True):
+    """Write many documents keyed by id using batched commits."""
+    db = get_db_connection()
+    c = db.collection(collection_name)
+    items = list(docs_by_id.items())
+    # Firestore batches are limited to 500 writes
+    for i in range(0, len(items), 500):
+        chunk = items[i : i + 500]
+        batch = db.batch()
+        for doc_id, data in chunk:
+            batch.set(c.document(str(doc_id)), data, merge=merge)
+        started = time.perf_counter()
+        batch.commit()
+        _record(collection_name, writes=len(chunk), started=started)
+    logger.info("saved documents", collection_name=collection_name, count=len(items))
+
+
 def retrieve_document(query, collection_name="games"):
     c = get_collection(collection_name=collection_name)
     bgg_id = ""
     docs = (
         c.where("query", "==", query)
-        .order_by("added_at", direction=firestore.Query.DESCENDING)
+        .order_by("added_at", direction="DESCENDING")
         .limit(1)
         .stream()
     )
@@ -88,3 +169,204 @@ def retrieve_messages(message_id):
         logger.info("no messages found", message_id=message_id)
         previous_messages = []
     return previous_messages
+
+
+class FirestoreUsage:
+    """Reads, writes and query latency per collection for one logical request."""
+
+    def __init__(self, name):
+        self.name = name
+        self.collections = {}
+        self._lock = threading.Lock()
+
+    def record(self, collection_name, reads=0, writes=0, latency_ms=0.0):
+        with self._lock:
+            stats = self.collections.setdefault(collection_name, _empty_stats())
+            stats["reads"] += reads
+            stats["writes"] += writes
+            stats["operations"] += 1
+            stats["latency_ms"] += latency_ms
+
+    def totals(self):
+        totals = _empty_stats()
+        for stats in self.collections.values():
+            for key in totals:
+                totals[key] += stats[key]
+        return totals
+
+
+@contextmanager
+def track_firestore_usage(name):
+    """Attribute all Firestore operations in this context to the request `name`."""
+    usage = FirestoreUsage(name)
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+        _report_usage(usage)
+
+
+def get_firestore_usage_stats():
+    """Aggregated Firestore usage per request name, costliest first."""
+    with _usage_lock:
+        stats = {
+            name: {
+                "requests": entry["requests"],
+                **entry["totals"],
+                "collections": {c: dict(v) for c, v in entry["collections"].items()},
+            }
+            for name, entry in _usage_totals.items()
+        }
+    return dict(sorted(stats.items(), key=lambda item: item[1]["reads"], reverse=True))
+
+
+def _empty_stats():
+    return {"reads": 0, "writes": 0, "operations": 0, "latency_ms": 0.0}
+
+
+def _record(collection_name, reads=0, writes=0, started=None):
+    latency_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record(collection_name, reads=reads, writes=writes, latency_ms=latency_ms)
+        return
+    # Background threads and scripts run outside any tracked request
+    with _usage_lock:
+        entry = _usage_totals.setdefault(
+            "untracked", {"requests": 0, "totals": _empty_stats(), "collections": {}}
+        )
+        _merge_stats(entry, collection_name, reads, writes, 1, latency_ms)
+
+
+def _merge_stats(entry, collection_name, reads, writes, operations, latency_ms):
+    for stats in (entry["totals"], entry["collections"].setdefault(collection_name, _empty_stats())):
+        stats["reads"] += reads
+        stats["writes"] += writes
+        stats["operations"] += operations
+        stats["latency_ms"] += latency_ms
+
+
+def _report_usage(usage):
+    totals = usage.totals()
+    with _usage_lock:
+        entry = _usage_totals.setdefault(
+            usage.name, {"requests": 0, "totals": _empty_stats(), "collections": {}}
+        )
+        entry["requests"] += 1
+        for collection_name, stats in usage.collections.items():
+            _merge_stats(entry, collection_name, **stats)
+
+    if not totals["operations"]:
+        return
+    logger.info(
+        "firestore usage",
+        request=usage.name,
+        reads=totals["reads"],
+        writes=totals["writes"],
+        operations=totals["operations"],
+        latency_ms=round(totals["latency_ms"], 1),
+        collections=usage.collections,
+    )
+    try:
+        import sentry_sdk
+
+        span = sentry_sdk.get_current_span()
+        if span:
+            for key, value in totals.items():
+                span.set_data(f"firestore.{key}", value)
+    except ImportError:
+        pass
+
+
+class _TrackedQuery:
+    """Query wrapper that records reads and latency of terminal operations."""
+
+    _CHAINED = {
+        "where",
+        "order_by",
+        "limit",
+        "limit_to_last",
+        "offset",
+        "select",
+        "start_at",
+        "start_after",
+        "end_at",
+        "end_before",
+    }
+
+    def __init__(self, query, collection_name):
+        self._query = query
+        self._collection_name = collection_name
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if name in self._CHAINED:
+            def chained(*args, **kwargs):
+                return _TrackedQuery(attr(*args, **kwargs), self._collection_name)
+            return chained
+        return attr
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        docs = self._query.get(*args, **kwargs)
+        # Firestore bills at least one read per query, even an empty one
+        _record(self._collection_name, reads=max(len(docs), 1), started=started)
+        return docs
+
+    def stream(self, *args, **kwargs):
+        return self._tracked_stream(self._query.stream(*args, **kwargs))
+
+    def _tracked_stream(self, docs):
+        started = time.perf_counter()
+        count = 0
+        try:
+            for doc in docs:
+                count += 1
+                yield doc
+        finally:
+            _record(self._collection_name, reads=max(count, 1), started=started)
+
+
+class _TrackedCollection(_TrackedQuery):
+    def document(self, *args, **kwargs):
+        return _TrackedDocument(self._query.document(*args, **kwargs), self._collection_name)
+
+    def add(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._query.add(*args, **kwargs)
+        _record(self._collection_name, writes=1, started=started)
+        return result
+
+
+class _TrackedDocument:
+    def __init__(self, ref, collection_name):
+        self._ref = ref
+        self._collection_name = collection_name
+
+    def __getattr__(self, name):
+        return getattr(self._ref, name)
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        snapshot = self._ref.get(*args, **kwargs)
+        _record(self._collection_name, reads=1, started=started)
+        return snapshot
+
+    def _write(self, method, *args, **kwargs):
+        started = time.perf_counter()
+        result = getattr(self._ref, method)(*args, **kwargs)
+        _record(self._collection_name, writes=1, started=started)
+        return result
+
+    def set(self, *args, **kwargs):
+        return self._write("set", *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._write("create", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
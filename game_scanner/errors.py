@@ -40,6 +40,36 @@ class SearchAPIError(Exception):
         logger.error(self.message, error_code=error_code, error_message=error_message)
 
 
+class BGGCollectionNotReadyError(Exception):
+    def __init__(self, username, waited_s):
+        self.username = username
+        self.waited_s = waited_s
+        self.message = (
+            f"BoardGameGeek is still preparing the collection of {username}, "
+            "please try again in a minute"
+        )
+        super().__init__(self.message)
+        logger.warning("bgg collection not ready", username=username, waited_s=waited_s)
+
+
+class BGGCollectionFetchError(Exception):
+    def __init__(self, username, status_code):
+        self.username = username
+        self.status_code = status_code
+        self.message = f"BoardGameGeek failed to return the collection of {username} (HTTP {status_code})"
+        super().__init__(self.message)
+        logger.error("collection fetch failed", username=username, status_code=status_code)
+
+
+class BGGLoginError(ValueError):
+    def __init__(self, username, status_code, response_text=None):
+        self.username = username
+        self.status_code = status_code
+        self.message = f"BGG login failed for user '{username}': {status_code}"
+        super().__init__(self.message)
+        logger.error("BGG login failed", username=username, status_code=status_code, response=response_text)
+
+
 # Backward-compatible aliases
 NoGoogleMatchesError = NoSearchMatchesError
 GoogleQuotaExceededError = SearchQuotaExceededError
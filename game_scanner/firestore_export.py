@@ -0,0 +1,180 @@
+import gzip
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+
+from game_scanner.db import get_db_connection
+
+logger = structlog.get_logger()
+
+# Fields dropped from exported documents. The users doc id is the API key.
+SECRET_FIELDS = {
+    "users": ("doc_id", "api_key", "encrypted_credentials", "encryption_key"),
+}
+# Collections whose document paths are secrets; checkpoints would store them
+# on disk, so these are never checkpointed and always export from the start
+SECRET_DOC_IDS = {"users"}
+
+CHECKPOINT_EVERY = 500
+_DONE = object()
+
+
+def export_collection(collection_name, output_path, partitions=4, resume=True):
+    """
+    Stream a Firestore collection to NDJSON, one document per line.
+
+    The collection is split into partition cursor ranges that are read in
+    parallel while a single writer appends lines as they arrive. Output is
+    gzip-compressed when output_path ends with ".gz". Progress is written to
+    "<output_path>.checkpoint" so an interrupted export resumes after the last
+    checkpointed document of each partition; lines written after that
+    checkpoint are exported again, so consumers should dedupe on doc_id.
+    Collections in SECRET_DOC_IDS are not checkpointed.
+
+    Returns the number of documents written by this run.
+    """
+    checkpoint_path = None if collection_name in SECRET_DOC_IDS else output_path + ".checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path, collection_name) if resume and checkpoint_path else None
+    if checkpoint is None:
+        bounds = get_partition_bounds(collection_name, partitions)
+        checkpoint = {
+            "collection": collection_name,
+            "partitions": [
+                {"start": start, "end": end, "last": None, "done": False}
+                for start, end in bounds
+            ],
+        }
+        mode = "wt"
+    else:
+        logger.info("resuming export", collection_name=collection_name, output_path=output_path)
+        mode = "at"
+
+    pending = [i for i, part in enumerate(checkpoint["partitions"]) if not part["done"]]
+    lines = queue.Queue(maxsize=1000)
+    stop = threading.Event()
+    written = 0
+
+    with _open_output(output_path, mode) as f, ThreadPoolExecutor(
+        max_workers=max(len(pending), 1)
+    ) as executor:
+        for i in pending:
+            executor.submit(_read_partition, collection_name, i, checkpoint["partitions"][i], lines, stop)
+
+        remaining = len(pending)
+        try:
+            while remaining:
+                i, path, payload = lines.get()
+                part = checkpoint["partitions"][i]
+                if path is _DONE:
+                    if payload is not None:
+                        raise payload
+                    part["done"] = True
+                    remaining -= 1
+                    continue
+                f.write(payload + "\n")
+                part["last"] = path
+                written += 1
+                if checkpoint_path and written % CHECKPOINT_EVERY == 0:
+                    f.flush()
+                    _save_checkpoint(checkpoint_path, checkpoint)
+        except BaseException:
+            stop.set()
+            f.flush()
+            if checkpoint_path:
+                _save_checkpoint(checkpoint_path, checkpoint)
+            raise
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logger.info("exported collection", collection_name=collection_name, count=written, output_path=output_path)
+    return written
+
+
+def get_partition_bounds(collection_name, partitions):
+    """Split a collection into (start, end) document path ranges."""
+    if partitions <= 1:
+        return [(None, None)]
+    db = get_db_connection()
+    try:
+        query = db.collection_group(collection_name)
+        return [
+            (
+                part.start_at.path if part.start_at else None,
+                part.end_at.path if part.end_at else None,
+            )
+            for part in query.get_partitions(partitions - 1)
+        ]
+    except Exception as e:
+        logger.warning("partition query failed, exporting sequentially", error=str(e))
+        return [(None, None)]
+
+
+def serialize_document(collection_name, doc):
+    data = doc.to_dict()
+    data["doc_id"] = doc.id
+    for field in SECRET_FIELDS.get(collection_name, ()):
+        data.pop(field, None)
+    return json.dumps(data, default=str)
+
+
+def _read_partition(collection_name, i, part, lines, stop):
+    try:
+        for doc in _stream_partition(collection_name, part):
+            if stop.is_set():
+                return
+            # Collection group queries also match subcollections of the same name
+            if doc.reference.parent.path != collection_name:
+                continue
+            _put(lines, (i, doc.reference.path, serialize_document(collection_name, doc)), stop)
+        _put(lines, (i, _DONE, None), stop)
+    except Exception as e:
+        _put(lines, (i, _DONE, e), stop)
+
+
+def _stream_partition(collection_name, part):
+    db = get_db_connection()
+    query = db.collection_group(collection_name).order_by("__name__")
+    if part["last"]:
+        query = query.start_after([db.document(part["last"])])
+    elif part["start"]:
+        query = query.start_at([db.document(part["start"])])
+    if part["end"]:
+        query = query.end_before([db.document(part["end"])])
+    return query.stream()
+
+
+def _put(lines, item, stop):
+    while not stop.is_set():
+        try:
+            lines.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _open_output(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _load_checkpoint(path, collection_name):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if checkpoint.get("collection") != collection_name:
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,241 @@
+import contextvars
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import structlog
+
+from game_scanner.bgg_client import get_client
+from game_scanner.bgg_xml import iter_response_elements
+from game_scanner.db import get_documents, save_documents
+
+logger = structlog.get_logger()
+
+METADATA_COLLECTION = "game_metadata"
+METADATA_TTL = timedelta(days=30)
+# Bumped when parse_thing gains fields; older records are refetched
+METADATA_VERSION = 2
+MEMORY_CACHE_SIZE = 5000
+
+# BGG's thing endpoint accepts at most 20 comma-separated ids per request
+THING_BATCH_SIZE = 20
+
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+_stats = {
+    "lookups": 0,
+    "memory_hits": 0,
+    "store_hits": 0,
+    "fetched": 0,
+    "refreshed": 0,
+    "stale_served": 0,
+    "thing_requests": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def get_game_metadata(game_id, user=None):
+    return get_games_metadata([game_id], user=user).get(str(game_id))
+
+
+def get_games_metadata(game_ids, user=None):
+    """
+    Get metadata records for many games, shared across users and processes.
+
+    Lookups go to the in-process cache, then the Firestore game_metadata
+    collection, and only then to BGG for games that are missing or older
+    than METADATA_TTL. A stale record is still returned if its refresh fails.
+    Games BGG does not know are left out of the result. BGG requests wait
+    in the limiter queue of user, the username the lookup is made for.
+    """
+    game_ids = [str(game_id) for game_id in dict.fromkeys(game_ids)]
+    records = {}
+    counts = dict.fromkeys(_stats, 0)
+    counts["lookups"] = len(game_ids)
+
+    with _memory_cache_lock:
+        for game_id in game_ids:
+            record = _memory_cache.get(game_id)
+            if record is not None and not _is_stale(record):
+                _memory_cache.move_to_end(game_id)
+                records[game_id] = record
+    counts["memory_hits"] = len(records)
+
+    missing = [game_id for game_id in game_ids if game_id not in records]
+    stale = {}
+    if missing:
+        for game_id, record in _read_store(missing).items():
+            if _is_stale(record):
+                stale[game_id] = record
+            else:
+                records[game_id] = record
+                counts["store_hits"] += 1
+        _remember({game_id: records[game_id] for game_id in missing if game_id in records})
+
+    to_fetch = [game_id for game_id in game_ids if game_id not in records]
+    if to_fetch:
+        fetched, counts["thing_requests"] = fetch_games_metadata(to_fetch, user=user)
+        if fetched:
+            _remember(fetched)
+            _write_store(fetched)
+        records.update(fetched)
+        counts["fetched"] = len(fetched)
+        counts["refreshed"] = len(stale.keys() & fetched.keys())
+        for game_id in stale.keys() - fetched.keys():
+            records[game_id] = stale[game_id]
+            counts["stale_served"] += 1
+
+    with _stats_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+    return records
+
+
+def get_game_info(game_ids):
+    """Game facts for the chat tools, without bookkeeping fields."""
+    records = get_games_metadata(game_ids)
+    return [
+        {key: value for key, value in record.items() if key != "fetched_at"}
+        for record in records.values()
+    ]
+
+
+def get_metadata_stats():
+    """Hit rate and staleness of the metadata store in this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    hits = stats["memory_hits"] + stats["store_hits"]
+    stats["hit_rate"] = round(hits / stats["lookups"], 3) if stats["lookups"] else None
+    with _memory_cache_lock:
+        ages = [_age(record) for record in _memory_cache.values()]
+    stats["cached_games"] = len(ages)
+    stats["mean_age_days"] = round(sum(ages, timedelta()) / len(ages) / timedelta(days=1), 1) if ages else None
+    stats["stale_cached_games"] = sum(age > METADATA_TTL for age in ages)
+    return stats
+
+
+def fetch_games_metadata(game_ids, user=None):
+    """Fetch records from BGG in chunks of ids. Returns (records, request_count)."""
+    chunks = [game_ids[i : i + THING_BATCH_SIZE] for i in range(0, len(game_ids), THING_BATCH_SIZE)]
+    records = {}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, _fetch_chunk, chunk, user) for chunk in chunks]
+        for future in futures:
+            records.update(future.result())
+    logger.info("fetched game metadata", count=len(records), requests=len(chunks))
+    return records, len(chunks)
+
+
+def _fetch_chunk(game_ids, user=None):
+    try:
+        response = get_client().get("thing", {"id": ",".join(game_ids), "stats": 1}, user=user)
+    except Exception as exc:
+        logger.error("game metadata fetch failed", bgg_ids=game_ids, error=str(exc))
+        return {}
+    with response:
+        if response.status_code != 200:
+            logger.error("game metadata fetch failed", bgg_ids=game_ids, status_code=response.status_code)
+            return {}
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        return {
+            item.get("id"): parse_thing(item, fetched_at)
+            for item in iter_response_elements(response, "item")
+        }
+
+
+def parse_thing(item, fetched_at=None):
+    """Parse one <item> of a thing response into a metadata record."""
+    names = item.findall("name")
+    primary = next((n.get("value") for n in names if n.get("type") == "primary"), None)
+    return {
+        "bgg_id": item.get("id"),
+        "name": primary,
+        "alternate_names": [n.get("value") for n in names if n.get("type") != "primary"],
+        "year": _int_value(item, "yearpublished"),
+        "min_players": _int_value(item, "minplayers"),
+        "max_players": _int_value(item, "maxplayers"),
+        "playing_time": _int_value(item, "playingtime"),
+        "min_playtime": _int_value(item, "minplaytime"),
+        "max_playtime": _int_value(item, "maxplaytime"),
+        "weight": _float_value(item, "statistics/ratings/averageweight"),
+        **_player_count_poll(item),
+        "version": METADATA_VERSION,
+        "fetched_at": fetched_at or datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _player_count_poll(item):
+    """
+    Player counts the community votes best at and recommended at.
+
+    A count is "best" when Best has the most votes and "recommended" when
+    Best and Recommended together outvote Not Recommended. Open-ended
+    results such as "4+" are skipped.
+    """
+    best_at, recommended_at = [], []
+    for results in item.findall("poll[@name='suggested_numplayers']/results"):
+        if not results.get("numplayers", "").isdigit():
+            continue
+        votes = {result.get("value"): int(result.get("numvotes", 0)) for result in results.findall("result")}
+        best = votes.get("Best", 0)
+        recommended = votes.get("Recommended", 0)
+        not_recommended = votes.get("Not Recommended", 0)
+        if best + recommended + not_recommended == 0:
+            continue
+        count = int(results.get("numplayers"))
+        if best >= recommended and best > not_recommended:
+            best_at.append(count)
+        if best + recommended > not_recommended:
+            recommended_at.append(count)
+    return {"best_at": best_at, "recommended_at": recommended_at}
+
+
+def _int_value(item, path):
+    element = item.find(path)
+    if element is None or not element.get("value", "").lstrip("-").isdigit():
+        return None
+    return int(element.get("value"))
+
+
+def _float_value(item, path):
+    element = item.find(path)
+    try:
+        value = float(element.get("value"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    # BGG reports 0 when nobody has voted
+    return value or None
+
+
+def _read_store(game_ids):
+    try:
+        return get_documents(game_ids, METADATA_COLLECTION)
+    except Exception as e:
+        logger.warning("game metadata store unavailable", error=str(e))
+        return {}
+
+
+def _write_store(records):
+    try:
+        save_documents(records, METADATA_COLLECTION)
+    except Exception as e:
+        logger.warning("failed to save game metadata", error=str(e))
+
+
+def _remember(records):
+    with _memory_cache_lock:
+        _memory_cache.update(records)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _age(record):
+    try:
+        return datetime.now(timezone.utc) - datetime.fromisoformat(record["fetched_at"])
+    except (KeyError, TypeError, ValueError):
+        return METADATA_TTL * 2
+
+
+def _is_stale(record):
+    return record.get("version", 1) < METADATA_VERSION or _age(record) > METADATA_TTL
@@ -1,89 +1,264 @@
+import hashlib
+import json
 import os
-import xml.etree.ElementTree as ET
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
+import threading
+import time
+from concurrent.futures import Future
 
-import requests
 import structlog
 
+from game_scanner import player_count_index
+from game_scanner.bgg_client import get_client
+from game_scanner.bgg_throttle import count_requests
+from game_scanner.collection_query import columns_for
+from game_scanner.bgg_xml import iter_response_elements, parse_collection_item
+from game_scanner.errors import BGGCollectionFetchError, BGGCollectionNotReadyError
+from game_scanner.game_metadata import get_games_metadata
+
 logger = structlog.get_logger()
 
+# BGG answers 202 while it builds a collection export; poll until this deadline
+COLLECTION_DEADLINE_S = 60
+
+# Metadata fields added to each game of a filtered collection
+DETAIL_FIELDS = ("min_players", "max_players", "playing_time", "weight", "year")
+
+# Collection snapshots are served fresh for SNAPSHOT_TTL_S, then served while
+# a background refresh runs until SNAPSHOT_MAX_STALE_S, then refetched inline
+SNAPSHOT_TTL_S = 15 * 60
+SNAPSHOT_MAX_STALE_S = 24 * 60 * 60
+
+# One in-flight collection poller per username, shared by concurrent requests
+_collection_fetches = {}
+_collection_fetches_lock = threading.Lock()
 
-def get_my_games(player_count, username=None, password=None):
+_snapshots = {}
+_refreshing = set()
+_snapshots_lock = threading.Lock()
+
+
+def get_my_games(
+    player_count=None,
+    username=None,
+    password=None,
+    max_playtime=None,
+    min_weight=None,
+    max_weight=None,
+    best_at=None,
+    recommended_at=None,
+    sort_by=None,
+    descending=False,
+    limit=None,
+):
     """Get user's game collection. Uses provided credentials or service account fallback."""
     # Use provided username or fall back to environment variable
     username = username or os.environ.get("BGG_USERNAME", "nraw")
 
     logger.info("retrieving game collection", username=username)
 
-    games = filter_games_by_playercount(username, player_count)
+    filters = {
+        "max_playtime": max_playtime,
+        "min_weight": min_weight,
+        "max_weight": max_weight,
+        "best_at": best_at,
+        "recommended_at": recommended_at,
+        "sort_by": sort_by,
+        "limit": limit,
+    }
+    if player_count is None and all(value is None for value in filters.values()):
+        return get_all_games(username)
+
+    with count_requests() as bgg:
+        # Answer from the per-user index, resynced only when the collection changed
+        snapshot = get_collection_snapshot(username)
+        index = player_count_index.load_index(username)
+        if index is None or index.get("collection_hash") != snapshot["hash"]:
+            index = player_count_index.sync_index(username, snapshot["games"], index, snapshot["hash"])
+        needed = _metadata_fields_for(filters)
+        if needed:
+            index = player_count_index.enrich_index(username, index, needed)
+
+        if all(value is None for value in filters.values()):
+            games = player_count_index.lookup(index, player_count)
+        else:
+            game_ids = columns_for(index).select(player_count=player_count, descending=descending, **filters)
+            games = [{"bgg_id": game_id, **index["games"][game_id]} for game_id in game_ids]
+    logger.info(
+        "filtered games from index",
+        username=username,
+        player_count=player_count,
+        count=len(games),
+        bgg_requests=bgg["requests"],
+        **{key: value for key, value in filters.items() if value is not None},
+    )
     return games
 
 
+def _metadata_fields_for(filters):
+    """Metadata-only index fields a query filters or sorts on."""
+    needed = []
+    if filters["min_weight"] is not None or filters["max_weight"] is not None or filters["sort_by"] == "weight":
+        needed.append("weight")
+    if filters["best_at"] is not None or filters["recommended_at"] is not None:
+        # The recommended mask includes the best counts
+        needed += ["best_at", "recommended_at"]
+    return tuple(needed)
+
+
 def get_all_games(username):
-    url = f"https://boardgamegeek.com/xmlapi2/collection?username={username}&own=1"
-    bgg_api_key = os.environ.get("BGG_API_KEY", "")
-    headers = {"Authorization": f"Bearer {bgg_api_key}"}
-    response = requests.get(url, headers=headers)
-
-    if response.status_code == 200:
-        root = ET.fromstring(response.content)
-        games = []
-        for item in root.findall("item"):
-            game_id = item.get("objectid")
-            game_name = item.find("name").text
-            games.append({"bgg_id": game_id, "name": game_name})
-        return games
-    else:
-        return []
+    snapshot = get_collection_snapshot(username)
+    return [dict(game) for game in snapshot["games"]]
+
+
+def get_collection_snapshot(username):
+    """
+    Return the cached collection of a user as {"games", "hash", "fetched_at"}.
+
+    Fresh snapshots cost no BGG calls. Stale ones are returned immediately
+    while a background thread refetches them. "hash" only changes when the
+    owned games change, so callers can skip recomputing derived data.
+    """
+    key = username.lower()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+    age = time.time() - snapshot["fetched_at"] if snapshot else None
+
+    if snapshot and age < SNAPSHOT_TTL_S:
+        return snapshot
+    if snapshot and age < SNAPSHOT_MAX_STALE_S:
+        _refresh_in_background(username)
+        logger.info("serving stale collection snapshot", username=username, age_s=round(age))
+        return snapshot
+    return _refresh_snapshot(username)
+
 
+def mark_collection_changed(username):
+    """Age the user's snapshot so the next read triggers a background refresh."""
+    with _snapshots_lock:
+        snapshot = _snapshots.get(username.lower())
+        if snapshot is not None:
+            _snapshots[username.lower()] = {**snapshot, "fetched_at": time.time() - SNAPSHOT_TTL_S}
 
-@lru_cache(maxsize=1000)
-def get_game_details(game_id):
-    url = f"https://boardgamegeek.com/xmlapi2/thing?id={game_id}"
-    bgg_api_key = os.environ.get("BGG_API_KEY", "")
-    headers = {"Authorization": f"Bearer {bgg_api_key}"}
-    response = requests.get(url, headers=headers)
 
-    if response.status_code == 200:
-        root = ET.fromstring(response.content)
-        item = root.find("item")
+def _refresh_snapshot(username):
+    """Refetch the collection; a failed fetch keeps the previous snapshot, if any."""
+    with _snapshots_lock:
+        previous = _snapshots.get(username.lower())
+    try:
+        games, _ = fetch_collection(username)
+    except Exception as e:
+        if previous is None:
+            raise
+        logger.warning("collection refresh failed, keeping previous snapshot", username=username, error=str(e))
+        return previous
+    snapshot = {"games": games, "hash": _collection_hash(games), "fetched_at": time.time()}
+    with _snapshots_lock:
+        _snapshots[username.lower()] = snapshot
+    changed = previous is None or previous["hash"] != snapshot["hash"]
+    logger.info("refreshed collection snapshot", username=username, games=len(games), changed=changed)
+    return snapshot
 
-        min_players = item.find("minplayers")
-        max_players = item.find("maxplayers")
 
-        min_players_value = (
-            int(min_players.get("value")) if min_players is not None else None
-        )
-        max_players_value = (
-            int(max_players.get("value")) if max_players is not None else None
-        )
+def _refresh_in_background(username):
+    key = username.lower()
+    with _snapshots_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
 
-        return {"min_players": min_players_value, "max_players": max_players_value}
-    else:
-        return {"min_players": None, "max_players": None}
+    def refresh():
+        try:
+            _refresh_snapshot(username)
+        except Exception as e:
+            logger.warning("background collection refresh failed", username=username, error=str(e))
+        finally:
+            with _snapshots_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def _collection_hash(games):
+    content = sorted(json.dumps(game, sort_keys=True) for game in games)
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def fetch_collection(username):
+    """
+    Fetch a user's owned games, waiting out BGG's 202 "queued" responses.
+
+    Concurrent calls for the same username share a single poller.
+    Returns (games, bgg_wait_s) where bgg_wait_s is the time spent waiting on BGG.
+    """
+    key = username.lower()
+    with _collection_fetches_lock:
+        future = _collection_fetches.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            _collection_fetches[key] = future
+
+    if is_owner:
+        try:
+            future.set_result(_poll_collection(username))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with _collection_fetches_lock:
+                _collection_fetches.pop(key, None)
+    return future.result()
+
+
+def _poll_collection(username):
+    # stats=1 adds player counts and playing time inline, sparing most thing lookups
+    params = {"username": username, "own": 1, "stats": 1}
+    started = time.monotonic()
+    response = get_client().get(
+        "collection", params, user=username, max_attempts=None, max_wait_s=COLLECTION_DEADLINE_S
+    )
+    waited = time.monotonic() - started
+    if response.status_code != 200:
+        response.close()
+        if response.status_code == 202:
+            raise BGGCollectionNotReadyError(username, waited)
+        raise BGGCollectionFetchError(username, response.status_code)
+
+    with response:
+        games = [parse_collection_item(item) for item in iter_response_elements(response, "item")]
+    logger.info("fetched collection", username=username, bgg_wait_s=round(waited, 2))
+    return games, waited
+
+
+def get_game_details(game_id, user=None):
+    return get_games_details([game_id], user=user)[str(game_id)]
+
+
+def get_games_details(game_ids, user=None):
+    """Get player counts and basics for many games from the shared metadata store."""
+    metadata = get_games_metadata(game_ids, user=user)
+    return {
+        str(game_id): {
+            field: metadata.get(str(game_id), {}).get(field) for field in DETAIL_FIELDS
+        }
+        for game_id in game_ids
+    }
 
 
 def filter_games_by_playercount(username, player_count):
     logger.info("filtering games by player count", username=username, player_count=player_count)
-    games = get_all_games(username)
+    started = time.monotonic()
+    games, bgg_wait_s = fetch_collection(username)
+    # Concurrent callers share the fetched dicts, so details go on copies
+    games = [dict(game) for game in games]
     logger.info("found games", count=len(games))
     if player_count is None:
         return games
 
-    # Get details for each game in parallel
-    with ThreadPoolExecutor() as executor:
-        future_to_game = {
-            executor.submit(get_game_details, game["bgg_id"]): game for game in games
-        }
-        for future in as_completed(future_to_game):
-            game = future_to_game[future]
-            try:
-                details = future.result()
-            except Exception as exc:
-                logger.error("game details fetch failed", bgg_id=game["bgg_id"], error=str(exc))
-            else:
-                game.update(details)
+    # Player counts usually come inline; only games without them hit the metadata store
+    incomplete = [game["bgg_id"] for game in games if game.get("min_players") is None or game.get("max_players") is None]
+    details = get_games_details(incomplete, user=username) if incomplete else {}
+    for game in games:
+        game.update(details.get(game["bgg_id"], {}))
 
     # Filter games by player count
     filtered_games = [
@@ -93,5 +268,10 @@ def filter_games_by_playercount(username, player_count):
         and game["max_players"] is not None
         and game["min_players"] <= player_count <= game["max_players"]
     ]
-    logger.info("filtered games", count=len(filtered_games))
+    logger.info(
+        "filtered games",
+        count=len(filtered_games),
+        bgg_wait_s=round(bgg_wait_s, 2),
+        processing_s=round(time.monotonic() - started - bgg_wait_s, 2),
+    )
     return filtered_games
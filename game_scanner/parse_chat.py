@@ -5,23 +5,33 @@ from datetime import date
 import openai
 import structlog
 
-from game_scanner.add_wishlist import add_wishlist, add_owned
+from game_scanner.add_wishlist import add_games_to_collection, add_wishlist, add_owned
+from game_scanner.game_metadata import get_game_info
 from game_scanner.list_my_games import get_my_games
 from game_scanner.play_payload_management import (
     get_bgg_id,
 )
+from game_scanner.play_queue import enqueue_play
+from game_scanner.play_stats import get_play_stats
 from game_scanner.register_play import (
     delete_logged_play,
+    delete_logged_plays,
     list_played_games,
     log_play_to_bgg,
+    log_plays_to_bgg,
 )
 from game_scanner.schemas import (
     BGGIdReuqest,
+    CollectionBatchRequest,
+    GameInfoRequest,
+    LogBatchDeletionRequest,
+    LogBatchRequest,
     LogDeletionRequest,
     LogRequest,
     LogsFilter,
     MyGamesFilter,
     PlayRequest,
+    PlayStatsRequest,
     WishlistRequest,
 )
 
@@ -29,16 +39,21 @@ logger = structlog.get_logger()
 
 func_map = {
     "log_game": log_play_to_bgg,
+    "log_games": log_plays_to_bgg,
     "wishlist_game": add_wishlist,
     "own_game": add_owned,
     "get_bgg_id": get_bgg_id,
     "list_played_games": list_played_games,
+    "play_stats": get_play_stats,
     "delete_play": delete_logged_play,
+    "delete_plays": delete_logged_plays,
+    "update_collection": add_games_to_collection,
     "list_my_games": get_my_games,
+    "get_game_info": get_game_info,
 }
 
 
-def parse_chat(messages: list[dict], bgg_username=None, bgg_password=None):
+def parse_chat(messages: list[dict], bgg_username=None, bgg_password=None, telegram_user_id=None, chat_id=None):
     """
     Parse chat messages and execute functions.
 
@@ -46,6 +61,8 @@ def parse_chat(messages: list[dict], bgg_username=None, bgg_password=None):
         messages: List of chat messages
         bgg_username: BGG username for functions that need credentials
         bgg_password: BGG password for functions that need credentials
+        telegram_user_id: Telegram user with a linked BGG account; single plays are then queued instead of logged right away
+        chat_id: Telegram chat notified once a queued play is logged
     """
     client = openai.OpenAI(
         api_key=os.environ["OPENAI_API_KEY"], base_url=os.environ["OPENAI_BASE_URL"]
@@ -72,12 +89,18 @@ def parse_chat(messages: list[dict], bgg_username=None, bgg_password=None):
         func = func_map[func_name]
 
         # Add credentials to functions that need them
-        if func_name in ["log_game", "delete_play", "list_played_games", "wishlist_game", "own_game", "list_my_games"] and bgg_username and bgg_password:
+        if func_name in ["log_game", "log_games", "delete_play", "delete_plays", "list_played_games", "play_stats", "wishlist_game", "own_game", "update_collection", "list_my_games"] and bgg_username and bgg_password:
             params["username"] = bgg_username
             params["password"] = bgg_password
             logger.info("added BGG credentials", func_name=func_name, user=bgg_username)
 
-        output = func(**params)
+        if func_name == "log_game" and telegram_user_id:
+            # The queue looks the credentials up again from the Telegram user when the job runs
+            play = {key: value for key, value in params.items() if key not in ("username", "password")}
+            job_id = enqueue_play(play, telegram_user_id=telegram_user_id, chat_id=chat_id)
+            output = f"Play queued as job {job_id}, the user will get a message once it is logged to BGG"
+        else:
+            output = func(**params)
         messages.append(
             {
                 "role": "system",
@@ -186,6 +209,14 @@ def get_all_tools():
                 "parameters": LogRequest.model_json_schema(),
             },
         },
+        {
+            "type": "function",
+            "function": {
+                "description": "Add logs of several plays at once, e.g. a whole game night. Use instead of log_game when more than one game was played. If no additional details are provided for the parameters, assume defaults.",
+                "name": "log_games",
+                "parameters": LogBatchRequest.model_json_schema(),
+            },
+        },
         {
             "type": "function",
             "function": {
@@ -202,6 +233,14 @@ def get_all_tools():
                 "parameters": WishlistRequest.model_json_schema(),
             },
         },
+        {
+            "type": "function",
+            "function": {
+                "description": "Set the collection status of several games at once, e.g. importing a wishlist or marking games as owned or for trade. Use instead of wishlist_game or own_game when more than one game is given.",
+                "name": "update_collection",
+                "parameters": CollectionBatchRequest.model_json_schema(),
+            },
+        },
         {
             "type": "function",
             "function": {
@@ -218,6 +257,14 @@ def get_all_tools():
                 "parameters": LogsFilter.model_json_schema(),
             },
         },
+        {
+            "type": "function",
+            "function": {
+                "description": "Get statistics of the logged plays: total plays, h-index, plays per year/month/week, longest and current streak of consecutive play days, dimes (games played 10+ times) and nickels (5-9 times), and the most played games with their first and last play. Use since/until for questions about a period, e.g. the most played game this year. Prefer this over list_played_games for any counting question.",
+                "name": "play_stats",
+                "parameters": PlayStatsRequest.model_json_schema(),
+            },
+        },
         {
             "type": "function",
             "function": {
@@ -229,10 +276,26 @@ def get_all_tools():
         {
             "type": "function",
             "function": {
-                "description": "List all games in my collection. If player_count is provided, it will filter the games by the number of players.",
+                "description": "Remove several play logs from BoardGameGeek at once, e.g. duplicates. Needs the log_ids which are obtained from list_played_games. Always ask for confirmation before executing this function.",
+                "name": "delete_plays",
+                "parameters": LogBatchDeletionRequest.model_json_schema(),
+            },
+        },
+        {
+            "type": "function",
+            "function": {
+                "description": "List all games in my collection. Optional filters: player_count, max_playtime, weight range (1 light to 5 heavy), and player counts the community votes best_at or recommended_at. Results can be sorted and limited.",
                 "name": "list_my_games",
                 "parameters": MyGamesFilter.model_json_schema(),
             },
         },
+        {
+            "type": "function",
+            "function": {
+                "description": "Get details of games: names, year, player counts, playing time and weight (complexity from 1 to 5). Needs the BoardGameGeek IDs of the games.",
+                "name": "get_game_info",
+                "parameters": GameInfoRequest.model_json_schema(),
+            },
+        },
     ]
     return tools, tool_choice
@@ -0,0 +1,257 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+import structlog
+
+from game_scanner.errors import BGGLoginError
+from game_scanner.register_play import get_play_id, mirror_logged_play, register_to_bgg, update_my_board_games
+from game_scanner.schemas import PlayPayload
+from game_scanner.user_auth import get_credentials_by_telegram_id
+
+logger = structlog.get_logger()
+
+DEFAULT_QUEUE_PATH = os.path.join(tempfile.gettempdir(), "bgg_play_queue.sqlite3")
+MAX_ATTEMPTS = 6
+RETRY_BASE_S = 30
+RETRY_MAX_S = 30 * 60
+# How often the worker looks for due retries when nothing was enqueued
+POLL_S = 15
+
+_worker = None
+_worker_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def open_queue(path=None):
+    path = path or os.environ.get("PLAY_QUEUE_PATH", DEFAULT_QUEUE_PATH)
+    # The temp dir is shared, so only this user may read the queue
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+    os.chmod(path, 0o600)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(play_jobs)")}
+    if "api_key" in columns:
+        # Queues written by older versions hold API keys in plain text
+        conn.execute("DROP TABLE play_jobs")
+        conn.execute("VACUUM")
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS play_jobs (
+            job_id TEXT PRIMARY KEY,
+            user_key TEXT NOT NULL,
+            telegram_user_id INTEGER,
+            chat_id INTEGER,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            play_id TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS play_jobs_pending ON play_jobs (status, user_key, created_at);
+        """
+    )
+    return conn
+
+
+def enqueue_play(play_payload_raw, telegram_user_id=None, chat_id=None):
+    """
+    Validate a play and queue it for logging to BGG; returns the job id.
+
+    Only the Telegram user id is stored, the BGG credentials are looked up
+    when the job runs. Without one the play is logged to the service account.
+    The queue lives on local disk, so only a long-lived process that runs
+    the worker (the Telegram bot) should enqueue plays.
+    """
+    payload = PlayPayload(**play_payload_raw).model_dump()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = open_queue()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO play_jobs (job_id, user_key, telegram_user_id, chat_id, payload, status, "
+                "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, str(telegram_user_id or "service"), telegram_user_id, chat_id, json.dumps(payload), now, now, now),
+            )
+    finally:
+        conn.close()
+    logger.info("queued play", job_id=job_id, game_id=payload["objectid"])
+    start_worker()
+    _wake.set()
+    return job_id
+
+
+def get_job(job_id):
+    """Status of a queued play, or None if the job is unknown."""
+    conn = open_queue()
+    try:
+        row = conn.execute("SELECT * FROM play_jobs WHERE job_id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    return job
+
+
+def start_worker():
+    """
+    Start the background worker once per process.
+
+    Jobs left running by a crash may already be logged on BGG, so they are
+    not posted again but marked unknown and their users asked to check.
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return _worker
+        conn = open_queue()
+        try:
+            rows = conn.execute("SELECT * FROM play_jobs WHERE status = 'running'").fetchall()
+        finally:
+            conn.close()
+        for row in rows:
+            job = dict(row)
+            job["payload"] = json.loads(job["payload"])
+            _finish(job, "unknown", error="Interrupted by a restart, the play may or may not be logged")
+        _worker = threading.Thread(target=_run_worker, name="play-queue", daemon=True)
+        _worker.start()
+        return _worker
+
+
+def drain_queue():
+    """Process every job that is due now; returns how many were attempted."""
+    attempted = 0
+    while True:
+        job = _claim_next_job()
+        if job is None:
+            return attempted
+        _process(job)
+        attempted += 1
+
+
+def _run_worker():
+    while True:
+        try:
+            drain_queue()
+        except Exception as e:
+            logger.error("play queue worker failed", error=str(e))
+        _wake.wait(timeout=POLL_S)
+        _wake.clear()
+
+
+def _claim_next_job():
+    # Only the oldest unfinished job of each user is eligible, so a user's
+    # plays reach BGG in the order they were queued even across retries
+    conn = open_queue()
+    try:
+        with conn:
+            row = conn.execute(
+                """
+                SELECT * FROM play_jobs AS job
+                WHERE status = 'queued' AND next_attempt_at <= ?
+                AND created_at = (
+                    SELECT MIN(created_at) FROM play_jobs
+                    WHERE user_key = job.user_key AND status IN ('queued', 'running')
+                )
+                ORDER BY next_attempt_at LIMIT 1
+                """,
+                (time.time(),),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE play_jobs SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (time.time(), row["job_id"]),
+            )
+    finally:
+        conn.close()
+    job = dict(row)
+    job["attempts"] += 1
+    job["payload"] = json.loads(job["payload"])
+    return job
+
+
+def _process(job):
+    username = password = None
+    try:
+        if job["telegram_user_id"]:
+            credentials = get_credentials_by_telegram_id(job["telegram_user_id"])
+            if not credentials:
+                _finish(job, "failed", error="No BGG account is linked to this Telegram user")
+                return
+            username, password = credentials
+        r = register_to_bgg(job["payload"], username, password)
+    except Exception as e:
+        if isinstance(e, BGGLoginError) or job["attempts"] >= MAX_ATTEMPTS:
+            _finish(job, "failed", error=str(e))
+        else:
+            _retry(job, str(e))
+        return
+
+    mirror_logged_play(username, r, job["payload"])
+    if not username:  # Service account
+        update_my_board_games()
+    _finish(job, "done", play_id=get_play_id(r))
+
+
+def _retry(job, error):
+    delay = min(RETRY_BASE_S * 2 ** (job["attempts"] - 1), RETRY_MAX_S) * random.uniform(0.5, 1.0)
+    conn = open_queue()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE play_jobs SET status = 'queued', next_attempt_at = ?, updated_at = ?, error = ? "
+                "WHERE job_id = ?",
+                (time.time() + delay, time.time(), error, job["job_id"]),
+            )
+    finally:
+        conn.close()
+    logger.warning("play job will be retried", job_id=job["job_id"], attempt=job["attempts"], retry_in=round(delay))
+
+
+def _finish(job, status, play_id=None, error=None):
+    conn = open_queue()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE play_jobs SET status = ?, play_id = ?, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, play_id, error, time.time(), job["job_id"]),
+            )
+    finally:
+        conn.close()
+    logger.info("play job finished", job_id=job["job_id"], status=status, attempts=job["attempts"], error=error)
+    _notify(job, status, play_id, error)
+
+
+def _notify(job, status, play_id, error):
+    chat_id = job["chat_id"] or job["telegram_user_id"] or os.getenv("TELEGRAM_CHAT_ID")
+    if chat_id is None or not os.getenv("TELEGRAM_TOKEN"):
+        return
+
+    game_id = job["payload"]["objectid"]
+    if status == "done":
+        text = f"Logged your play of https://boardgamegeek.com/boardgame/{game_id} (play {play_id})"
+    elif status == "unknown":
+        text = (
+            f"Your play of https://boardgamegeek.com/boardgame/{game_id} was interrupted by a restart, "
+            "please check your BGG plays before logging it again"
+        )
+    else:
+        text = f"Could not log your play of https://boardgamegeek.com/boardgame/{game_id}: {error}"
+    try:
+        import telebot
+
+        telebot.TeleBot(os.environ["TELEGRAM_TOKEN"]).send_message(chat_id=chat_id, text=text)
+    except Exception as e:
+        logger.warning("failed to send play job notification", job_id=job["job_id"], error=str(e))
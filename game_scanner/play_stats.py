@@ -0,0 +1,139 @@
+from datetime import date
+
+import numpy as np
+import structlog
+
+from game_scanner.register_play import list_played_games
+
+logger = structlog.get_logger()
+
+STATS = ("h_index", "periods", "streaks", "milestones", "top_games")
+PERIODS = ("year", "month", "week")
+# Plays of one game needed for a nickel and a dime
+NICKEL = 5
+DIME = 10
+
+
+class PlayColumns:
+    """
+    A user's plays as parallel NumPy arrays, one entry per logged play.
+
+    Days are counted since 1970-01-01 and each play counts quantity times.
+    Games are numbered 0..n-1 in the order of game_ids.
+    """
+
+    def __init__(self, plays):
+        plays = [play for play in plays if play.get("date") and play.get("game_id")]
+        self.days = np.array([play["date"] for play in plays], dtype="datetime64[D]").astype(np.int64)
+        self.quantities = np.array([play.get("quantity") or 1 for play in plays], dtype=np.int64)
+        ids = np.array([int(play["game_id"]) for play in plays], dtype=np.int64)
+        # Plays come newest first, so the first occurrence holds the current name
+        self.game_ids, first, self.games = np.unique(ids, return_index=True, return_inverse=True)
+        self.names = [plays[i]["game"] for i in first]
+
+    def __len__(self):
+        return len(self.days)
+
+    def plays_per_game(self):
+        return np.bincount(self.games, weights=self.quantities, minlength=len(self.game_ids)).astype(np.int64)
+
+    def h_index(self):
+        """The largest h such that h games were played at least h times each."""
+        counts = np.sort(self.plays_per_game())[::-1]
+        return int(np.count_nonzero(counts >= np.arange(1, len(counts) + 1)))
+
+    def period_counts(self, period="month"):
+        """Plays per year, month or week (keyed by its Monday), oldest first."""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period {period}, expected one of {', '.join(PERIODS)}")
+        if period == "week":
+            # 1970-01-01 was a Thursday
+            keys = (self.days - (self.days + 3) % 7).astype("datetime64[D]")
+        else:
+            unit = "Y" if period == "year" else "M"
+            keys = self.days.astype("datetime64[D]").astype(f"datetime64[{unit}]")
+        periods, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse, weights=self.quantities, minlength=len(periods))
+        return {str(key): int(count) for key, count in zip(periods, counts)}
+
+    def streaks(self, today=None):
+        """The longest run of consecutive days with plays, and the run still going today or yesterday."""
+        days = np.unique(self.days)
+        if len(days) == 0:
+            return {"longest": 0, "current": 0}
+        # Runs start at the first day and after every gap
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(days) != 1) + 1))
+        lengths = np.diff(np.concatenate((starts, [len(days)])))
+        longest = int(np.argmax(lengths))
+        today = (today or date.today()).toordinal() - date(1970, 1, 1).toordinal()
+        current = int(lengths[-1]) if today - days[-1] <= 1 else 0
+        return {
+            "longest": int(lengths[longest]),
+            "longest_from": _iso(days[starts[longest]]),
+            "longest_to": _iso(days[starts[longest] + lengths[longest] - 1]),
+            "current": current,
+        }
+
+    def milestones(self):
+        """Games played at least DIME times, and those between NICKEL and DIME."""
+        counts = self.plays_per_game()
+        order = np.argsort(-counts, kind="stable")
+        return {
+            "dimes": [self.names[i] for i in order if counts[i] >= DIME],
+            "nickels": [self.names[i] for i in order if NICKEL <= counts[i] < DIME],
+        }
+
+    def top_games(self, limit=10):
+        """The most played games with their first and last play."""
+        counts = self.plays_per_game()
+        first = np.full(len(self.game_ids), np.iinfo(np.int64).max)
+        last = np.full(len(self.game_ids), np.iinfo(np.int64).min)
+        np.minimum.at(first, self.games, self.days)
+        np.maximum.at(last, self.games, self.days)
+        # Ties go to the game played most recently
+        order = np.lexsort((-last, -counts))[:limit]
+        return [
+            {
+                "game": self.names[i],
+                "game_id": str(self.game_ids[i]),
+                "plays": int(counts[i]),
+                "first_play": _iso(first[i]),
+                "last_play": _iso(last[i]),
+            }
+            for i in order
+        ]
+
+
+def get_play_stats(stats=None, since=None, until=None, period="month", top_n=10, username=None, password=None):
+    """
+    Statistics of a user's logged plays, optionally limited to a date range.
+
+    stats picks which of STATS to compute, all of them by default.
+    """
+    stats = stats or STATS
+    unknown = set(stats) - set(STATS)
+    if unknown:
+        raise ValueError(f"Unknown stats {', '.join(sorted(unknown))}, expected some of {', '.join(STATS)}")
+
+    plays = list_played_games(since=since, username=username, password=password)
+    if until is not None:
+        plays = [play for play in plays if play.get("date") and play["date"] <= until]
+    columns = PlayColumns(plays)
+
+    result = {"plays": int(columns.quantities.sum()), "games": len(columns.game_ids)}
+    if "h_index" in stats:
+        result["h_index"] = columns.h_index()
+    if "periods" in stats:
+        result[f"plays_per_{period}"] = columns.period_counts(period)
+    if "streaks" in stats:
+        result["streaks"] = columns.streaks()
+    if "milestones" in stats:
+        result["milestones"] = columns.milestones()
+    if "top_games" in stats:
+        result["top_games"] = columns.top_games(top_n)
+    logger.info("computed play stats", username=username, plays=result["plays"], stats=list(stats))
+    return result
+
+
+def _iso(day):
+    return str(np.int64(day).astype("datetime64[D]"))
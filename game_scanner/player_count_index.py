@@ -0,0 +1,178 @@
+import threading
+from datetime import datetime, timezone
+
+import structlog
+
+from game_scanner.db import get_collection
+from game_scanner.game_metadata import get_games_metadata
+
+logger = structlog.get_logger()
+
+INDEX_COLLECTION = "player_count_indexes"
+# Bumped when index entries change shape; older stored indexes are rebuilt
+INDEX_VERSION = 2
+# Player counts with a precomputed game list; larger counts scan the ranges
+MAX_INDEXED_PLAYERS = 12
+# Firestore documents are limited to 1 MiB, bigger indexes stay in memory only
+MAX_PERSISTED_GAMES = 3000
+# Fields the collection returns inline with stats=1, and those only the thing endpoint has
+INLINE_FIELDS = ("name", "min_players", "max_players", "playing_time", "year")
+METADATA_FIELDS = ("weight", "best_at", "recommended_at")
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def load_index(username):
+    """Return the user's index from memory or Firestore, or None if there is none."""
+    key = username.lower()
+    with _indexes_lock:
+        index = _indexes.get(key)
+    if index is not None:
+        return index
+
+    try:
+        doc = get_collection(INDEX_COLLECTION).document(key).get()
+    except Exception as e:
+        logger.warning("player count index store unavailable", error=str(e))
+        return None
+    if not doc.exists:
+        return None
+    data = doc.to_dict()
+    if data.get("version") != INDEX_VERSION:
+        return None
+    index = _new_index(data.get("games", {}), data.get("collection_hash"), data.get("built_at"))
+    with _indexes_lock:
+        _indexes[key] = index
+    return index
+
+
+def sync_index(username, collection_games, index=None, collection_hash=None):
+    """
+    Bring the index in line with a changed collection.
+
+    Added games are indexed from the fields the collection returned inline;
+    only those without player counts are looked up in the metadata store.
+    Removed games are dropped. METADATA_FIELDS are filled in later by
+    enrich_index when a query needs them.
+    """
+    is_new = index is None
+    games = dict(index["games"]) if index else {}
+    collection_ids = {game["bgg_id"] for game in collection_games}
+    added = [game for game in collection_games if game["bgg_id"] not in games]
+    removed = games.keys() - collection_ids
+    for game_id in removed:
+        del games[game_id]
+    incomplete = [game["bgg_id"] for game in added if game.get("min_players") is None or game.get("max_players") is None]
+    metadata = get_games_metadata(incomplete, user=username) if incomplete else {}
+    for game in added:
+        games[game["bgg_id"]] = _index_entry(game, metadata.get(game["bgg_id"]) if game["bgg_id"] in incomplete else None)
+
+    index = _new_index(games, collection_hash)
+    logger.info(
+        "synced player count index",
+        username=username,
+        games=len(games),
+        added=len(added),
+        removed=len(removed),
+        metadata_lookups=len(incomplete),
+    )
+    _store(username, index, changed=bool(added or removed) or is_new)
+    return index
+
+
+def add_game(username, game_id, name=None):
+    """Add a newly owned game to an existing index."""
+    index = load_index(username)
+    if index is None:
+        return
+    game_id = str(game_id)
+    metadata = get_games_metadata([game_id], user=username).get(game_id, {})
+    games = dict(index["games"])
+    games[game_id] = _index_entry({"bgg_id": game_id, "name": name}, metadata)
+    # The collection hash is kept: the next snapshot containing this game
+    # differs from it and resyncs, finding nothing left to add
+    _store(username, _new_index(games, index["collection_hash"], index["built_at"]), changed=True)
+    logger.info("added game to player count index", username=username, bgg_id=game_id)
+
+
+def enrich_index(username, index, fields=METADATA_FIELDS):
+    """Fill in metadata-only fields for the games that do not have them yet."""
+    missing = [game_id for game_id, game in index["games"].items() if any(field not in game for field in fields)]
+    if not missing:
+        return index
+    metadata = get_games_metadata(missing, user=username)
+    games = dict(index["games"])
+    for game_id in missing:
+        games[game_id] = _index_entry(games[game_id], metadata.get(game_id, {}))
+    index = _new_index(games, index["collection_hash"], index["built_at"])
+    logger.info("enriched player count index", username=username, games=len(missing), fields=list(fields))
+    _store(username, index, changed=True)
+    return index
+
+
+def lookup(index, player_count):
+    if player_count <= MAX_INDEXED_PLAYERS:
+        game_ids = index["by_count"].get(player_count, [])
+    else:
+        game_ids = [
+            game_id
+            for game_id, game in index["games"].items()
+            if _supports(game, player_count)
+        ]
+    return [{"bgg_id": game_id, **index["games"][game_id]} for game_id in game_ids]
+
+
+def _new_index(games, collection_hash=None, built_at=None):
+    by_count = {
+        count: [game_id for game_id, game in games.items() if _supports(game, count)]
+        for count in range(1, MAX_INDEXED_PLAYERS + 1)
+    }
+    return {
+        "games": games,
+        "by_count": by_count,
+        "collection_hash": collection_hash,
+        "built_at": built_at or datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _index_entry(game, metadata=None):
+    """
+    Index entry of a game from its collection record and optional metadata.
+
+    METADATA_FIELDS are only present once metadata was looked up, even when
+    BGG had no value for them, so each game is enriched at most once.
+    """
+    entry = {field: game.get(field) for field in INLINE_FIELDS}
+    entry.update({field: game[field] for field in METADATA_FIELDS if field in game})
+    if metadata is not None:
+        for field in INLINE_FIELDS:
+            if entry[field] is None:
+                entry[field] = metadata.get(field)
+        entry.update({field: metadata.get(field) for field in METADATA_FIELDS})
+    return entry
+
+
+def _supports(game, player_count):
+    return (
+        game["min_players"] is not None
+        and game["max_players"] is not None
+        and game["min_players"] <= player_count <= game["max_players"]
+    )
+
+
+def _store(username, index, changed=True):
+    key = username.lower()
+    with _indexes_lock:
+        _indexes[key] = index
+    if len(index["games"]) > MAX_PERSISTED_GAMES:
+        return
+    try:
+        doc = get_collection(INDEX_COLLECTION).document(key)
+        meta = {"built_at": index["built_at"], "collection_hash": index["collection_hash"], "version": INDEX_VERSION}
+        if changed:
+            doc.set({**meta, "games": index["games"]})
+        else:
+            doc.set(meta, merge=True)
+    except Exception as e:
+        logger.warning("failed to save player count index", error=str(e))
@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import structlog
+
+from game_scanner.game_metadata import get_game_metadata
+
+logger = structlog.get_logger()
+
+DEFAULT_MIRROR_PATH = os.path.join(tempfile.gettempdir(), "bgg_plays.sqlite3")
+# Plays are answered locally for SYNC_TTL_S, then the last RESYNC_WINDOW_DAYS
+# are fetched again; a full resync catches plays edited or deleted on BGG itself
+SYNC_TTL_S = 10 * 60
+RESYNC_WINDOW_DAYS = 30
+FULL_SYNC_INTERVAL_S = 24 * 60 * 60
+
+_sync_locks = {}
+_background_syncs = set()
+_sync_locks_lock = threading.Lock()
+
+
+def open_mirror(path=None):
+    conn = sqlite3.connect(path or os.environ.get("PLAYS_MIRROR_PATH", DEFAULT_MIRROR_PATH))
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS plays (
+            username TEXT NOT NULL,
+            play_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            game_id TEXT,
+            game TEXT,
+            comment TEXT,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (username, play_id)
+        );
+        CREATE INDEX IF NOT EXISTS plays_date ON plays (username, date);
+        CREATE INDEX IF NOT EXISTS plays_game ON plays (username, game_id, date);
+        CREATE TABLE IF NOT EXISTS sync_state (
+            username TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL,
+            full_synced_at REAL NOT NULL
+        );
+        """
+    )
+    return conn
+
+
+def get_plays(game_ids=None, last_n=None, since=None, username=None, password=None):
+    """
+    Logged plays of a user, newest first, answered from the local mirror.
+
+    The mirror is synced with BGG first when it is older than SYNC_TTL_S.
+    While it still needs a full sync, queries for the last_n plays or plays
+    since a date are answered from the newest BGG pages instead, and the
+    whole history is downloaded in the background.
+    """
+    username = username or os.environ["BGG_USERNAME"]
+    if (last_n or since) and _full_sync_due(username):
+        # Imported here, register_play updates the mirror after writes
+        from game_scanner.register_play import iter_logged_plays
+
+        _sync_in_background(username)
+        return list(iter_logged_plays(game_ids, last_n, since, username))
+    sync_plays(username)
+
+    clauses = ["username = ?"]
+    params = [username.lower()]
+    if game_ids is not None:
+        clauses.append(f"game_id IN ({', '.join('?' * len(game_ids))})")
+        params += [str(game_id) for game_id in game_ids]
+    if since is not None:
+        clauses.append("date >= ?")
+        params.append(since)
+    sql = (
+        "SELECT play_id, date, game, game_id, comment, quantity FROM plays "
+        f"WHERE {' AND '.join(clauses)} ORDER BY date DESC, CAST(play_id AS INTEGER) DESC"
+    )
+    if last_n:
+        sql += " LIMIT ?"
+        params.append(last_n)
+
+    conn = open_mirror()
+    try:
+        return [
+            dict(play_id=play_id, date=play_date, game=game, game_id=game_id, comment=comment, quantity=quantity)
+            for play_id, play_date, game, game_id, comment, quantity in conn.execute(sql, params)
+        ]
+    finally:
+        conn.close()
+
+
+def sync_plays(username, force=False):
+    """
+    Bring the user's mirror up to date with BGG.
+
+    The first sync and one every FULL_SYNC_INTERVAL_S download the whole
+    history. In between only plays dated within RESYNC_WINDOW_DAYS of the
+    newest known play are fetched (mindate), and known plays in that window
+    that BGG no longer returns are removed.
+    """
+    key = username.lower()
+    with _sync_locks_lock:
+        lock = _sync_locks.setdefault(key, threading.Lock())
+    with lock:
+        conn = open_mirror()
+        try:
+            state = conn.execute(
+                "SELECT synced_at, full_synced_at FROM sync_state WHERE username = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if state is not None and not force and now - state[0] < SYNC_TTL_S:
+                return 0
+
+            # Imported here, register_play updates the mirror after writes
+            from game_scanner.register_play import get_logged_plays
+
+            full = state is None or now - state[1] > FULL_SYNC_INTERVAL_S
+            since = None if full else _window_start(conn, key)
+            plays = get_logged_plays(since=since, username=username)
+            _replace_window(conn, key, plays, since)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (username, synced_at, full_synced_at) VALUES (?, ?, ?)",
+                    (key, now, now if full else state[1]),
+                )
+        finally:
+            conn.close()
+    logger.info("synced plays mirror", username=username, plays=len(plays), full=full, since=since)
+    return len(plays)
+
+
+def _full_sync_due(username):
+    conn = open_mirror()
+    try:
+        state = conn.execute(
+            "SELECT synced_at, full_synced_at FROM sync_state WHERE username = ?", (username.lower(),)
+        ).fetchone()
+    finally:
+        conn.close()
+    now = time.time()
+    return state is None or (now - state[0] >= SYNC_TTL_S and now - state[1] > FULL_SYNC_INTERVAL_S)
+
+
+def _sync_in_background(username):
+    key = username.lower()
+    with _sync_locks_lock:
+        if key in _background_syncs:
+            return
+        _background_syncs.add(key)
+
+    def sync():
+        try:
+            sync_plays(username)
+        except Exception as e:
+            logger.warning("background plays sync failed", username=username, error=str(e))
+        finally:
+            with _sync_locks_lock:
+                _background_syncs.discard(key)
+
+    threading.Thread(target=sync, daemon=True).start()
+
+
+def record_play(username, play_id, play_payload):
+    """Add a play just logged on BGG to a user's mirror, if the user has one."""
+    if play_id is None:
+        return
+    conn = open_mirror()
+    try:
+        if not _is_mirrored(conn, username):
+            return
+        game = (get_game_metadata(play_payload["objectid"], user=username) or {}).get("name")
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO plays (username, play_id, date, game_id, game, comment, quantity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    username.lower(),
+                    str(play_id),
+                    play_payload["playdate"],
+                    str(play_payload["objectid"]),
+                    game,
+                    play_payload.get("comments") or None,
+                    play_payload.get("quantity", 1),
+                ),
+            )
+    finally:
+        conn.close()
+
+
+def remove_play(username, play_id):
+    """Drop a play just deleted on BGG from a user's mirror."""
+    conn = open_mirror()
+    try:
+        with conn:
+            conn.execute("DELETE FROM plays WHERE username = ? AND play_id = ?", (username.lower(), str(play_id)))
+    finally:
+        conn.close()
+
+
+def _replace_window(conn, key, plays, since):
+    with conn:
+        if since is None:
+            conn.execute("DELETE FROM plays WHERE username = ?", (key,))
+        else:
+            conn.execute("DELETE FROM plays WHERE username = ? AND date >= ?", (key, since))
+        conn.executemany(
+            "INSERT OR REPLACE INTO plays (username, play_id, date, game_id, game, comment, quantity) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (key, play["play_id"], play["date"], play["game_id"], play["game"], play["comment"], play["quantity"])
+                for play in plays
+            ],
+        )
+
+
+def _window_start(conn, key):
+    (newest,) = conn.execute("SELECT MAX(date) FROM plays WHERE username = ?", (key,)).fetchone()
+    if newest is None:
+        return None
+    return (date.fromisoformat(newest) - timedelta(days=RESYNC_WINDOW_DAYS)).isoformat()
+
+
+def _is_mirrored(conn, username):
+    return conn.execute(
+        "SELECT 1 FROM sync_state WHERE username = ?", (username.lower(),)
+    ).fetchone() is not None
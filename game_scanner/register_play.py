@@ -1,16 +1,26 @@
+import contextvars
+import math
 import os
-import xml.etree.ElementTree as ET
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from typing import List, Optional
 
-import cloudscraper
-import requests
 import structlog
+from pydantic import ValidationError
 
+from game_scanner.bgg_client import get_client
+from game_scanner.bgg_session import bgg_post, ensure_logged_in
+from game_scanner import board_games_dispatch, plays_mirror
+from game_scanner.bgg_xml import iter_response_elements
 from game_scanner.schemas import PlayPayload
 
 logger = structlog.get_logger()
 
+# BGG returns plays in pages of 100; later pages are fetched in parallel
+PLAYS_PAGE_SIZE = 100
+PLAYS_PAGE_CONCURRENCY = 4
+
 
 def log_play_to_bgg(username=None, password=None, **play_payload_raw):
     """Log a play to BGG using provided credentials or service account fallback."""
@@ -20,26 +30,80 @@ def log_play_to_bgg(username=None, password=None, **play_payload_raw):
     if r.status_code != 200:
         error_message = f"Failed to log play: {r.text}"
         return error_message
-    try:
-        # Only update personal board games if using service account
-        if not username:  # Service account
-            update_my_board_games()
-    except Exception as e:
-        logger.warning("failed to update my_board_games", error=str(e))
+    mirror_logged_play(username, r, play_payload)
+    # Only update personal board games if using service account
+    if not username:  # Service account
+        update_my_board_games()
 
     account_info = f" to {username}'s account" if username else " to service account"
     response_text = f"Successfully logged play{account_info}: {play_payload}"
     return response_text
 
 
+def log_plays_to_bgg(plays, username=None, password=None):
+    """
+    Log several plays over one BGG login. Uses provided credentials or service account fallback.
+
+    Every play is validated first; invalid ones are reported and skipped.
+    The rest are posted one at a time over the user's logged-in session.
+    Returns the number of logged and failed plays and the outcome of each.
+    """
+    outcomes = [None] * len(plays)
+    payloads = {}
+    for i, play in enumerate(plays):
+        try:
+            payloads[i] = PlayPayload(**play).model_dump()
+        except ValidationError as e:
+            outcomes[i] = {"game_id": play.get("game_id"), "status": "invalid", "error": str(e)}
+
+    if payloads:
+        try:
+            ensure_logged_in(username or os.environ["BGG_USERNAME"], password or os.environ["BGG_PASS"])
+        except ValueError as e:
+            return {"logged": 0, "failed": len(plays), "error": str(e)}
+
+        # bgg_post sends one POST per user at a time, so plays are simply posted in turn
+        for i, payload in payloads.items():
+            try:
+                r = register_to_bgg(payload, username, password)
+                mirror_logged_play(username, r, payload)
+                outcomes[i] = {"game_id": payload["objectid"], "status": "logged", "play_id": get_play_id(r)}
+            except Exception as e:
+                outcomes[i] = {"game_id": payload["objectid"], "status": "failed", "error": str(e)}
+
+    logged = sum(outcome["status"] == "logged" for outcome in outcomes)
+    logger.info("logged play batch", username=username, logged=logged, plays=len(plays))
+    if logged and not username:  # Service account
+        update_my_board_games()
+    return {"logged": logged, "failed": len(plays) - logged, "plays": outcomes}
+
+
+def mirror_logged_play(username, response, play_payload):
+    try:
+        plays_mirror.record_play(username or os.environ["BGG_USERNAME"], get_play_id(response), play_payload)
+    except Exception as e:
+        logger.warning("failed to update plays mirror", error=str(e))
+
+
+def get_play_id(response):
+    try:
+        return response.json().get("playid")
+    except (ValueError, AttributeError):
+        return None
+
+
 def register_play(game_id, username=None, password=None):
     play_payload = get_play_payload(game_id)
     return register_to_bgg(play_payload, username, password)
 
 
 def list_played_games(**logs_filter):
-    plays = get_logged_plays(**logs_filter)
-    return plays
+    """Logged plays from the local mirror, or straight from BGG if the mirror is unusable."""
+    try:
+        return plays_mirror.get_plays(**logs_filter)
+    except sqlite3.Error as e:
+        logger.warning("plays mirror unavailable", error=str(e))
+        return get_logged_plays(**logs_filter)
 
 
 def register_to_bgg(play_payload, username=None, password=None):
@@ -47,19 +111,10 @@ def register_to_bgg(play_payload, username=None, password=None):
     username = username or os.environ["BGG_USERNAME"]
     password = password or os.environ["BGG_PASS"]
 
-    login_payload = {"credentials": {"username": username, "password": password}}
-
-    s = cloudscraper.create_scraper()
-    login_response = s.post(
-        "https://boardgamegeek.com/login/api/v1",
-        json=login_payload,
-    )
-    if not login_response.ok:
-        logger.error("BGG login failed", username=username, status_code=login_response.status_code, response=login_response.text)
-        raise ValueError(f"BGG login failed for user '{username}': {login_response.status_code}")
-
-    r = s.post(
+    r = bgg_post(
         "https://boardgamegeek.com/geekplay.php",
+        username,
+        password,
         json=play_payload,
     )
     if r.status_code != 200:
@@ -118,57 +173,137 @@ def get_logged_plays(
 
     logger.info("retrieving logged plays", username=username)
 
-    base_url = f"https://boardgamegeek.com/xmlapi2/plays?username={username}"
-    plays = []
+    if last_n is not None:
+        # The newest plays come first, so walking pages in order can stop early
+        return list(iter_logged_plays(game_ids, last_n, since, username))
+
+    def fetch(page):
+        return _fetch_plays_page(username, page, game_ids, since)
+
+    # Page 1 tells how many plays there are, the remaining pages are fetched concurrently
+    root_attrib = {}
+    plays, page_plays = _fetch_plays_page(username, 1, game_ids, since, root_attrib)
+    total = int(root_attrib.get("total", 0) or 0)
+    last_page = max(math.ceil(total / PLAYS_PAGE_SIZE), 1)
     page = 1
-    bgg_api_key = os.environ.get("BGG_API_KEY", "")
-    headers = {"Accept": "application/xml", "Authorization": f"Bearer {bgg_api_key}"}
+    if page_plays and last_page > 1:
+        with ThreadPoolExecutor(max_workers=PLAYS_PAGE_CONCURRENCY) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, fetch, page)
+                for page in range(2, last_page + 1)
+            ]
+            for page, future in enumerate(futures, start=2):
+                filtered, page_plays = future.result()
+                plays += filtered
+                if not page_plays:
+                    break
+
+    # A full last page means plays were logged since page 1 was read (or total
+    # was missing), so keep paging until a page comes back short
+    while page_plays == PLAYS_PAGE_SIZE:
+        page += 1
+        filtered, page_plays = fetch(page)
+        plays += filtered
+
+    logger.info("retrieved logged plays", username=username, plays=len(plays), total=total, pages=page)
+    return plays
+
 
+def iter_logged_plays(
+    game_ids: Optional[List[int]] = None,
+    last_n: Optional[int] = None,
+    since: Optional[str] = None,
+    username=None,
+):
+    """
+    Yield a user's matching plays, newest first, fetching pages only as they are consumed.
+
+    Fetching stops once last_n plays were yielded, a play older than since
+    shows up, or the caller stops iterating.
+    """
+    username = username or os.environ["BGG_USERNAME"]
+    yielded = 0
+    page = 1
     while True:
-        url = f"{base_url}&page={page}"
-        if since is not None:
-            url += f"&mindate={since}"
-        response = requests.get(url, headers=headers)
+        page_plays = 0
+        params = _plays_params(username, page, game_ids, since)
+        with get_client().get("plays", params, user=username) as response:
+            response.raise_for_status()
+            for play in iter_response_elements(response, "play"):
+                page_plays += 1
+                if since is not None and play.get("date", "") < since:
+                    return
+                play_info = _play_info(play, game_ids)
+                if play_info is None:
+                    continue
+                yield play_info
+                yielded += 1
+                if last_n and yielded >= last_n:
+                    return
+        if page_plays < PLAYS_PAGE_SIZE:
+            return
+        page += 1
+
+
+def _plays_params(username, page, game_ids, since):
+    params = {"username": username, "page": page}
+    if since is not None:
+        params["mindate"] = since
+    # BGG filters by a single game itself, sparing the pages of other games
+    if game_ids is not None and len(game_ids) == 1:
+        params["id"] = game_ids[0]
+    return params
+
+
+def _fetch_plays_page(username, page, game_ids, since, root_attrib=None):
+    """Fetch and filter one page of plays; returns (matching plays, number of plays on the page)."""
+    plays = []
+    params = _plays_params(username, page, game_ids, since)
+    with get_client().get("plays", params, user=username) as response:
         response.raise_for_status()
-        root = ET.fromstring(response.content)
-        all_plays = root.findall("play")
+        page_plays = _filter_page(iter_response_elements(response, "play", root_attrib), game_ids, since, plays)
+    return plays, page_plays
 
-        if not all_plays:
-            break
 
-        i = 0
-        for play in all_plays:
-            if last_n and i >= last_n:
+def _filter_page(page, game_ids, since, plays):
+    """Append the matching plays of one page to plays; returns how many plays the page had."""
+    page_plays = 0
+    for play in page:
+        page_plays += 1
+        if since is not None:
+            play_date = play.get("date", "")
+            if play_date < since:
                 break
-            if since is not None:
-                play_date = play.get("date", "")
-                if play_date < since:
-                    break
-            play_id = play.get("id")
-            date = play.get("date")
-            game_item = play.find("item")
-            if game_item:
-                game = game_item.get("name")
-                game_id = game_item.get("objectid")
-                if (
-                    game_ids is not None
-                    and game_id is not None
-                    and int(game_id) not in game_ids
-                ):
-                    continue
-            else:
-                raise ValueError
-            comments = play.find("comments")
-            comment = comments.text if comments is not None else None
-            play_info = dict(
-                play_id=play_id, date=date, game=game, game_id=game_id, comment=comment
-            )
+        play_info = _play_info(play, game_ids)
+        if play_info is not None:
             plays.append(play_info)
-            i += 1
-
-        page += 1
-
-    return plays
+    return page_plays
+
+
+def _play_info(play, game_ids):
+    """The fields of a <play>, or None when it is not one of game_ids."""
+    game_item = play.find("item")
+    if game_item:
+        game = game_item.get("name")
+        game_id = game_item.get("objectid")
+        if (
+            game_ids is not None
+            and game_id is not None
+            and int(game_id) not in game_ids
+        ):
+            return None
+    else:
+        raise ValueError
+    comments = play.find("comments")
+    comment = comments.text if comments is not None else None
+    return dict(
+        play_id=play.get("id"),
+        date=play.get("date"),
+        game=game,
+        game_id=game_id,
+        comment=comment,
+        quantity=int(play.get("quantity") or 1),
+    )
 
 
 def delete_logged_play(play_id, username=None, password=None):
@@ -177,30 +312,53 @@ def delete_logged_play(play_id, username=None, password=None):
     username = username or os.environ["BGG_USERNAME"]
     password = password or os.environ["BGG_PASS"]
 
-    login_payload = {"credentials": {"username": username, "password": password}}
     delete_play_payload = get_delete_play_payload(play_id)
 
-    s = cloudscraper.create_scraper()
-    login_response = s.post(
-        "https://boardgamegeek.com/login/api/v1",
-        json=login_payload,
-    )
-    if not login_response.ok:
-        logger.error("BGG login failed", username=username, status_code=login_response.status_code, response=login_response.text)
-        raise ValueError(f"BGG login failed for user '{username}': {login_response.status_code}")
-
-    r = s.post(
+    r = bgg_post(
         "https://boardgamegeek.com/geekplay.php",
+        username,
+        password,
         json=delete_play_payload,
     )
     if r.status_code != 200:
         logger.error("BGG play deletion failed", username=username, status_code=r.status_code, response=r.text)
         raise ValueError(f"BGG play deletion failed for user '{username}': {r.status_code}")
 
+    try:
+        plays_mirror.remove_play(username, play_id)
+    except Exception as e:
+        logger.warning("failed to update plays mirror", error=str(e))
+
     logger.info("deleted play", play_id=play_id, username=username)
     return r.text
 
 
+def delete_logged_plays(play_ids, username=None, password=None):
+    """
+    Delete several logged plays over one BGG login. Uses provided credentials or service account fallback.
+
+    Plays are deleted one at a time over the user's logged-in session.
+    Returns the number of deleted and failed plays and the outcome of each.
+    """
+    try:
+        ensure_logged_in(username or os.environ["BGG_USERNAME"], password or os.environ["BGG_PASS"])
+    except ValueError as e:
+        return {"deleted": 0, "failed": len(play_ids), "error": str(e)}
+
+    def delete(play_id):
+        try:
+            delete_logged_play(play_id, username, password)
+            return {"play_id": play_id, "status": "deleted"}
+        except Exception as e:
+            return {"play_id": play_id, "status": "failed", "error": str(e)}
+
+    outcomes = [delete(play_id) for play_id in play_ids]
+
+    deleted = sum(outcome["status"] == "deleted" for outcome in outcomes)
+    logger.info("deleted play batch", username=username, deleted=deleted, plays=len(play_ids))
+    return {"deleted": deleted, "failed": len(play_ids) - deleted, "plays": outcomes}
+
+
 def get_delete_play_payload(play_id):
     delete_play_payload = {
         "playid": play_id,
@@ -212,16 +370,8 @@ def get_delete_play_payload(play_id):
 
 
 def update_my_board_games():
+    """Ask for a my_board_games rebuild; plays logged close together trigger a single one."""
     try:
-        github_token = os.getenv("GH_TOKEN", "")
-        headers = {
-            "contentType": "application/json",
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": "token " + github_token,
-        }
-        data = {"event_type": "webhook"}
-        url = "https://api.github.com/repos/nraw/my_board_games/dispatches"
-        r = requests.post(url, headers=headers, json=data)
-        logger.info("triggered update to my_board_games", status_code=r.status_code)
-    except Exception:
-        logger.error("failed to update my_board_games")
+        board_games_dispatch.request_dispatch()
+    except Exception as e:
+        logger.error("failed to update my_board_games", error=str(e))
@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
@@ -47,25 +47,70 @@ class LogRequest(BaseModel):
     length: int = Field(0, description="Length of the game in minutes")
 
 
+class LogBatchRequest(BaseModel):
+    plays: List[LogRequest] = Field(..., description="Plays to log, one entry per game played")
+
+
 class WishlistRequest(BaseModel):
     game_id: int = Field(..., description="BoardGameGeek of the game")
 
 
+class CollectionItemRequest(BaseModel):
+    game_id: int = Field(..., description="BoardGameGeek of the game")
+    status: Literal["own", "prevowned", "fortrade", "want", "wanttoplay", "wanttobuy", "wishlist", "preordered"] = Field(
+        ..., description="Collection status to give the game"
+    )
+
+
+class CollectionBatchRequest(BaseModel):
+    items: List[CollectionItemRequest] = Field(..., description="Games to update, one entry per game")
+
+
 class BGGIdReuqest(BaseModel):
     game: str = Field(..., description="Name of the game")
 
 
+class GameInfoRequest(BaseModel):
+    game_ids: list = Field(..., description="List of BoardGameGeek IDs")
+
+
 class MyGamesFilter(BaseModel):
     player_count: Optional[int] = Field(..., description="Number of players")
+    max_playtime: Optional[int] = Field(None, description="Maximum playing time in minutes")
+    min_weight: Optional[float] = Field(None, description="Minimum weight (complexity from 1 to 5)")
+    max_weight: Optional[float] = Field(None, description="Maximum weight (complexity from 1 to 5)")
+    best_at: Optional[int] = Field(None, description="Player count the community votes the game best at")
+    recommended_at: Optional[int] = Field(
+        None, description="Player count the community recommends the game at"
+    )
+    sort_by: Optional[Literal["name", "playing_time", "weight", "year"]] = Field(
+        None, description="Field to sort the games by"
+    )
+    descending: bool = Field(False, description="Sort in descending order")
+    limit: Optional[int] = Field(None, description="Maximum number of games to return")
 
 
 class LogDeletionRequest(BaseModel):
     play_id: int = Field(..., description="ID of the play to delete")
 
 
+class LogBatchDeletionRequest(BaseModel):
+    play_ids: List[int] = Field(..., description="IDs of the plays to delete")
+
+
 class LogsFilter(BaseModel):
     game_ids: Optional[list] = Field(None, description="List of BoardGameGeek IDs")
     last_n: Optional[int] = Field(
         None, description="Number of logs to return. Format YYYY-MM-DD"
     )
     since: Optional[str] = Field(None, description="Filter logs before this date")
+
+
+class PlayStatsRequest(BaseModel):
+    stats: Optional[List[Literal["h_index", "periods", "streaks", "milestones", "top_games"]]] = Field(
+        None, description="Statistics to compute, all of them when omitted"
+    )
+    since: Optional[str] = Field(None, description="Only count plays on or after this date. Format YYYY-MM-DD")
+    until: Optional[str] = Field(None, description="Only count plays on or before this date. Format YYYY-MM-DD")
+    period: Literal["year", "month", "week"] = Field("month", description="Period of the play counts")
+    top_n: int = Field(10, description="Number of most played games to return")
@@ -1,5 +1,9 @@
 import base64
+import hashlib
 import secrets
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timezone
 from typing import Dict, Optional, Tuple
 
@@ -10,6 +14,23 @@ from game_scanner.db import get_collection
 
 logger = structlog.get_logger()
 
+# Decrypted credentials are kept per API key for CREDENTIALS_TTL_S, and
+# unknown keys are remembered for INVALID_KEY_TTL_S
+CREDENTIALS_TTL_S = 5 * 60
+INVALID_KEY_TTL_S = 60
+CREDENTIALS_CACHE_MAX = 1000
+# Past this many unknown keys a minute, each further unknown key is answered
+# one at a time after a delay, which slows down guessing API keys; lookups
+# of valid keys are never delayed
+MAX_INVALID_KEYS_PER_MIN = 30
+THROTTLED_LOOKUP_DELAY_S = 1.0
+
+_credentials_cache = OrderedDict()
+_credentials_lock = threading.Lock()
+_invalid_lookups = deque()
+_throttle_lock = threading.Lock()
+_throttled_misses = threading.Lock()
+
 
 def validate_bgg_credentials(username: str, password: str) -> bool:
     """Validate BGG credentials by attempting login."""
@@ -129,6 +150,7 @@ def create_user(bgg_username: str, bgg_password: str) -> str:
 
     # Use API key as document ID for easy lookup
     users_collection.document(api_key).set(user_data)
+    invalidate_credentials(api_key)
 
     logger.info("created user", bgg_username=bgg_username)
     return api_key
@@ -171,16 +193,7 @@ def get_user_by_api_key(api_key: str) -> Optional[Dict]:
 
 def get_user_bgg_credentials(api_key: str) -> Optional[Tuple[str, str]]:
     """Get decrypted BGG credentials for a user."""
-    user = get_user_by_api_key(api_key)
-    if not user:
-        return None
-
-    try:
-        encryption_key = base64.b64decode(user["encryption_key"].encode())
-        return decrypt_credentials(user["encrypted_credentials"], encryption_key)
-    except Exception as e:
-        logger.error("error decrypting credentials", error=str(e))
-        return None
+    return verify_and_get_credentials(api_key)
 
 
 def verify_api_key(api_key: str) -> bool:
@@ -189,16 +202,61 @@ def verify_api_key(api_key: str) -> bool:
 
 
 def verify_and_get_credentials(api_key: str) -> Optional[Tuple[str, str]]:
-    """Verify API key and return decrypted credentials in a single DB read.
+    """Verify API key and return decrypted credentials.
 
     Returns None if API key is invalid, otherwise returns (username, password).
-    This is more efficient than calling verify_api_key() then get_user_bgg_credentials()
-    separately, as it only performs one database read.
+    Results are cached, so a burst of requests with the same key costs one
+    database read and one decryption; invalid keys are cached too.
+    """
+    if not api_key:
+        return None
+
+    key = _credentials_key(api_key)
+    now = time.monotonic()
+    with _credentials_lock:
+        cached = _credentials_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _credentials_cache.move_to_end(key)
+            return cached[1]
+
+    try:
+        user_doc = get_collection("users").document(api_key).get()
+    except Exception as e:
+        # Not cached, the key may well be valid
+        logger.error("error retrieving user", error=str(e))
+        return None
+    credentials = _decrypt_user(user_doc.to_dict()) if user_doc.exists else None
+
+    if credentials is None:
+        _delay_invalid_lookup()
+    ttl_s = CREDENTIALS_TTL_S if credentials is not None else INVALID_KEY_TTL_S
+    with _credentials_lock:
+        _credentials_cache[key] = (time.monotonic() + ttl_s, credentials)
+        _credentials_cache.move_to_end(key)
+        while len(_credentials_cache) > CREDENTIALS_CACHE_MAX:
+            _credentials_cache.popitem(last=False)
+    return credentials
+
+
+def get_credentials_by_telegram_id(telegram_user_id: int) -> Optional[Tuple[str, str]]:
+    """Return the decrypted BGG credentials of a Telegram user, or None if they have no account.
+
+    Unlike verify_and_get_credentials, read errors are raised rather than
+    reported as an unknown user, so callers can retry them.
     """
-    user = get_user_by_api_key(api_key)
-    if not user:
+    docs = list(get_collection("users").where("telegram_user_id", "==", telegram_user_id).limit(1).get())
+    if not docs:
         return None
+    return _decrypt_user(docs[0].to_dict())
 
+
+def invalidate_credentials(api_key: str) -> None:
+    """Forget the cached credentials of an API key, e.g. after the user was deleted."""
+    with _credentials_lock:
+        _credentials_cache.pop(_credentials_key(api_key), None)
+
+
+def _decrypt_user(user: Dict) -> Optional[Tuple[str, str]]:
     try:
         encryption_key = base64.b64decode(user["encryption_key"].encode())
         return decrypt_credentials(user["encrypted_credentials"], encryption_key)
@@ -207,6 +265,26 @@ def verify_and_get_credentials(api_key: str) -> Optional[Tuple[str, str]]:
         return None
 
 
+def _delay_invalid_lookup():
+    """Count an unknown key, and answer it late while many are being tried."""
+    with _throttle_lock:
+        now = time.monotonic()
+        while _invalid_lookups and _invalid_lookups[0] < now - 60:
+            _invalid_lookups.popleft()
+        _invalid_lookups.append(now)
+        invalid_keys = len(_invalid_lookups)
+    if invalid_keys <= MAX_INVALID_KEYS_PER_MIN:
+        return
+    logger.warning("throttling invalid API key lookups", invalid_keys_last_min=invalid_keys)
+    with _throttled_misses:
+        time.sleep(THROTTLED_LOOKUP_DELAY_S)
+
+
+def _credentials_key(api_key: str) -> str:
+    # Only hashes of API keys are kept in memory
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
 def delete_user(api_key: str) -> bool:
     """Delete a user account and all associated data."""
     try:
@@ -220,6 +298,7 @@ def delete_user(api_key: str) -> bool:
 
         # Delete user document
         user_doc.delete()
+        invalidate_credentials(api_key)
         logger.info("deleted user", api_key=api_key)
         return True
 
@@ -246,6 +325,7 @@ def delete_user_by_telegram_id(telegram_user_id: int) -> bool:
         # Delete the user document
         doc_id = docs[0].id
         users_collection.document(doc_id).delete()
+        invalidate_credentials(doc_id)
 
         logger.info("deleted user", telegram_user_id=telegram_user_id)
         return True
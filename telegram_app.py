@@ -8,8 +8,10 @@ from game_scanner.logging import setup_logging
 setup_logging()
 logger = structlog.get_logger()
 
+from game_scanner import board_games_dispatch, play_queue  # noqa: E402
 from game_scanner.commands import set_it, spike_it  # noqa: E402
-from game_scanner.db import retrieve_messages, save_document  # noqa: E402
+from game_scanner.db import (retrieve_messages, save_document,  # noqa: E402
+                             track_firestore_usage)
 from game_scanner.parse_chat import parse_chat, reply_with_last_bot_query  # noqa: E402
 from game_scanner.telegram_utils import (check_is_user, consume_credit,  # noqa: E402
                                          get_user_by_telegram_id,
@@ -930,6 +932,11 @@ def next_step(message: telebot.types.Message):
 
 
 def perform_step(message):
+    with track_firestore_usage("telegram.perform_step"):
+        _perform_step(message)
+
+
+def _perform_step(message):
     bot.send_chat_action(message.chat.id, "typing")
     user_id = message.from_user.id
     first_name = message.from_user.first_name or "there"
@@ -976,9 +983,11 @@ Ready to get started? 🎲"""
         # Get user's BGG credentials for play logging
         bgg_username = None
         bgg_password = None
+        api_key = None
         try:
             user_data = get_user_by_telegram_id(user_id)
             if user_data and user_data.get('api_key'):
+                api_key = user_data['api_key']
                 from game_scanner.user_auth import get_user_bgg_credentials
                 credentials = get_user_bgg_credentials(user_data['api_key'])
                 if credentials:
@@ -994,7 +1003,10 @@ Ready to get started? 🎲"""
         answer = None
         i = 0
         while answer is None and i < 10:
-            messages, answer = parse_chat(messages, bgg_username, bgg_password)
+            messages, answer = parse_chat(
+                messages, bgg_username, bgg_password, telegram_user_id=user_id if api_key else None,
+                chat_id=message.chat.id,
+            )
             if answer is None:
                 reply = reply_with_last_bot_query(bot, message, messages)
             i += 1
@@ -1014,4 +1026,7 @@ if __name__ == "__main__":
     sha = os.popen("git rev-parse HEAD").read().strip()
     message = f"Chief, I'm up and running! (≧ω≦)ゞ\nSHA: {sha}"
     bot.send_message(chat_id=os.getenv("TELEGRAM_CHAT_ID", -4108154376), text=message)
+    # Resume plays and my_board_games updates left pending by the previous run
+    play_queue.start_worker()
+    board_games_dispatch.start_worker()
     bot.infinity_polling()
@@ -1,6 +1,44 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import requests
+
 from game_scanner.add_wishlist import *
 
 
 def test_add_wishlist():
     game_id = "420087"
     what = add_wishlist(game_id)
+
+
+def test_add_games_to_collection_reports_each_game():
+    def post(url, username, password, data, headers):
+        item = json.loads(data)["item"]
+        if item["objectid"] == "2":
+            return MagicMock(status_code=500, text="boom")
+        return MagicMock(status_code=200)
+
+    items = [{"game_id": 1, "status": "wishlist"}, {"game_id": 2, "status": "own"}, {"game_id": 3, "status": "lost"},
+             {"game_id": 4, "status": {"own": True, "fortrade": True}}]
+    with patch("game_scanner.add_wishlist.ensure_logged_in") as mock_login, patch(
+        "game_scanner.add_wishlist.bgg_post", side_effect=post
+    ) as mock_post, patch("game_scanner.add_wishlist._collection_changed") as mock_changed:
+        result = add_games_to_collection(items, username="nraw", password="secret")
+
+    mock_login.assert_called_once_with("nraw", "secret")
+    assert mock_post.call_count == 3
+    assert (result["updated"], result["failed"]) == (2, 2)
+    assert [game["status"] for game in result["games"]] == ["updated", "failed", "failed", "updated"]
+    mock_changed.assert_any_call("nraw", "4", {"own": True, "fortrade": True})
+
+
+def test_network_error_fails_only_its_game():
+    responses = [MagicMock(status_code=200), requests.ConnectionError("reset"), MagicMock(status_code=200)]
+    items = [{"game_id": game_id, "status": "own"} for game_id in (1, 2, 3)]
+    with patch("game_scanner.add_wishlist.ensure_logged_in"), patch(
+        "game_scanner.add_wishlist.bgg_post", side_effect=responses
+    ), patch("game_scanner.add_wishlist._collection_changed"):
+        result = add_games_to_collection(items, username="nraw", password="secret")
+
+    assert [game["status"] for game in result["games"]] == ["updated", "failed", "updated"]
+    assert result["games"][1]["error"] == "reset"
@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from game_scanner.analytics_store import query_documents, sync_collection
+
+
+def _make_doc(doc_id, data):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = dict(data)
+    doc.get.side_effect = lambda field: data.get(field)
+    return doc
+
+
+def test_sync_uses_watermark_and_queries_locally(tmp_path):
+    store_path = str(tmp_path / "store.sqlite3")
+    first = [
+        _make_doc("a", {"query": "111", "bgg_id": "1", "added_at": "2025-01-01T10:00:00"}),
+        _make_doc("b", {"query": "222", "bgg_id": "2", "added_at": "2025-01-02T10:00:00"}),
+    ]
+    second = [
+        first[1],
+        _make_doc("c", {"query": "111", "bgg_id": "3", "added_at": "2025-01-03T10:00:00"}),
+    ]
+    collection = MagicMock()
+    collection.order_by.return_value.stream.return_value = iter(first)
+    collection.where.return_value.order_by.return_value.stream.return_value = iter(second)
+
+    with patch("game_scanner.analytics_store.get_collection", return_value=collection):
+        assert sync_collection("games", store_path=store_path) == 2
+        sync_collection("games", store_path=store_path)
+
+    collection.where.assert_called_once_with("added_at", ">=", "2025-01-02T10:00:00")
+    rows = query_documents("games", where={"query": "111"}, store_path=store_path)
+    assert [row["doc_id"] for row in rows] == ["c", "a"]
+    rows = query_documents("games", since="2025-01-02", store_path=store_path)
+    assert [row["doc_id"] for row in rows] == ["c", "b"]
+
+
+def test_datetime_watermark_round_trips(tmp_path):
+    store_path = str(tmp_path / "store.sqlite3")
+    ts = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+    collection = MagicMock()
+    collection.order_by.return_value.stream.return_value = iter(
+        [_make_doc("t1", {"query": "x", "timestamp": ts})]
+    )
+    collection.where.return_value.order_by.return_value.stream.return_value = iter([])
+
+    with patch("game_scanner.analytics_store.get_collection", return_value=collection):
+        sync_collection("lookup_traces", store_path=store_path)
+        sync_collection("lookup_traces", store_path=store_path)
+
+    collection.where.assert_called_once_with("timestamp", ">=", ts)
+
+
+def test_collections_without_watermark_are_refused(tmp_path):
+    with patch("game_scanner.analytics_store.get_collection") as mock_collection:
+        with pytest.raises(ValueError, match="no watermark field"):
+            sync_collection("users", store_path=str(tmp_path / "store.sqlite3"))
+
+    mock_collection.assert_not_called()
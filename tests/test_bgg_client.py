@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from game_scanner.bgg_client import BGGClient
+
+
+def _response(status_code, body=b"", headers=None):
+    response = MagicMock(status_code=status_code, headers=headers or {})
+    response.iter_content.side_effect = lambda chunk_size: iter([body[:3], body[3:]])
+    return response
+
+
+def test_retries_throttled_and_failed_requests():
+    client = BGGClient(base_url="https://bgg.test/xmlapi2")
+    responses = [_response(429, headers={"Retry-After": "5"}), requests.ConnectionError(), _response(200, b"<items/>")]
+
+    with patch.object(client.session, "get", side_effect=responses) as mock_get, patch(
+        "game_scanner.bgg_client.time.sleep"
+    ) as mock_sleep:
+        response = client.get("thing", {"id": "13,822", "stats": 1})
+
+    assert response.status_code == 200
+    assert mock_get.call_args.args[0] == "https://bgg.test/xmlapi2/thing?id=13,822&stats=1"
+    assert mock_sleep.call_args_list[0].args[0] == 5
+    stats = client.stats()["endpoints"]["thing"]
+    assert (stats["requests"], stats["retried"], stats["errors"], stats["statuses"]) == (3, 2, 1, {429: 1, 200: 1})
+
+
+def test_gives_up_and_returns_the_last_response():
+    client = BGGClient()
+
+    with patch.object(client.session, "get", return_value=_response(202)) as mock_get, patch(
+        "game_scanner.bgg_client.time.sleep"
+    ):
+        assert client.get("collection", {"username": "nraw"}, max_attempts=3).status_code == 202
+
+    assert mock_get.call_count == 3
+
+
+def test_unchanged_response_is_served_from_cache():
+    client = BGGClient()
+    body = b"<plays/>"
+
+    with patch.object(client.session, "get", return_value=_response(200, body, {"ETag": '"v1"'})):
+        with client.get("plays", {"username": "nraw"}) as response:
+            assert b"".join(response.iter_content(chunk_size=4)) == body
+
+    with patch.object(client.session, "get", return_value=_response(304)) as mock_get:
+        with client.get("plays", {"username": "nraw"}) as response:
+            assert b"".join(response.iter_content(chunk_size=4)) == body
+
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert client.stats()["endpoints"]["plays"]["not_modified"] == 1
+
+
+def test_partly_read_response_is_not_cached():
+    client = BGGClient()
+
+    with patch.object(client.session, "get", return_value=_response(200, b"<plays/>", {"ETag": '"v1"'})):
+        with client.get("plays", {"username": "nraw"}) as response:
+            next(response.iter_content(chunk_size=4))
+
+    assert client.stats()["cached_responses"] == 0
+
+
+def test_response_over_the_size_limit_is_not_cached():
+    client = BGGClient()
+    body = b"<plays>" + b" " * 16 + b"</plays>"
+
+    with patch.object(client.session, "get", return_value=_response(200, body, {"ETag": '"v1"'})), patch(
+        "game_scanner.bgg_client.CACHE_MAX_ENTRY_BYTES", 8
+    ):
+        with client.get("plays", {"username": "nraw"}) as response:
+            assert b"".join(response.iter_content(chunk_size=4)) == body
+
+    assert client.stats()["cached_responses"] == 0
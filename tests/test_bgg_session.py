@@ -0,0 +1,97 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import game_scanner.bgg_session as bgg_session
+from game_scanner.bgg_session import bgg_post
+
+PLAY_URL = "https://boardgamegeek.com/geekplay.php"
+
+
+def _response(status_code=200, body=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.headers = {"content-type": "application/json"}
+    response.json.return_value = body or {}
+    return response
+
+
+@pytest.fixture(autouse=True)
+def scraper():
+    with patch.object(bgg_session, "_sessions", bgg_session.OrderedDict()), patch(
+        "game_scanner.bgg_session.cloudscraper.create_scraper"
+    ) as create:
+        yield create
+
+
+def _posted_urls(scraper):
+    return [c.args[0] for c in scraper.return_value.post.call_args_list]
+
+
+def test_consecutive_actions_reuse_the_login(scraper):
+    scraper.return_value.post.return_value = _response()
+
+    bgg_post(PLAY_URL, "nraw", "secret", json={"playid": 1})
+    bgg_post(PLAY_URL, "NRAW", "secret", json={"playid": 2})
+
+    assert scraper.call_count == 1
+    assert _posted_urls(scraper) == [bgg_session.LOGIN_URL, PLAY_URL, PLAY_URL]
+
+
+def test_expired_login_is_renewed_once(scraper):
+    scraper.return_value.post.side_effect = [
+        _response(),
+        _response(200, {"error": "You must login to save plays"}),
+        _response(),
+        _response(200, {"playid": "1"}),
+    ]
+
+    response = bgg_post(PLAY_URL, "nraw", "secret", json={})
+
+    assert response.json() == {"playid": "1"}
+    assert _posted_urls(scraper) == [bgg_session.LOGIN_URL, PLAY_URL, bgg_session.LOGIN_URL, PLAY_URL]
+
+
+def test_failed_login_raises_and_is_not_cached(scraper):
+    scraper.return_value.post.return_value = _response(403)
+
+    with pytest.raises(ValueError):
+        bgg_post(PLAY_URL, "nraw", "wrong", json={})
+
+    assert bgg_session._sessions == {}
+
+
+def test_idle_and_excess_sessions_are_evicted(scraper):
+    scraper.return_value.post.return_value = _response()
+    with patch.object(bgg_session, "MAX_SESSIONS", 2):
+        for username in ("a", "b", "c"):
+            bgg_post(PLAY_URL, username, "secret")
+
+    assert [key[0] for key in bgg_session._sessions] == ["b", "c"]
+    with patch("game_scanner.bgg_session.time.monotonic", return_value=10**9):
+        bgg_session._get_user_session("d", "secret")
+    assert [key[0] for key in bgg_session._sessions] == ["d"]
+
+
+def test_posts_of_one_user_do_not_overlap(scraper):
+    in_flight = []
+    overlaps = []
+
+    def post(url, **kwargs):
+        overlaps.append(bool(in_flight))
+        in_flight.append(url)
+        time.sleep(0.01)
+        in_flight.pop()
+        return _response()
+
+    scraper.return_value.post.side_effect = post
+    threads = [threading.Thread(target=bgg_post, args=(PLAY_URL, "nraw", "secret")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(overlaps) == 5 and not any(overlaps)
@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from game_scanner.bgg_throttle import AdaptiveLimiter, limited_get
+
+
+def test_limit_grows_on_success_and_halves_on_throttling():
+    limiter = AdaptiveLimiter(initial=4, maximum=8)
+    for _ in range(8):
+        limiter.acquire()
+        limiter.release(200, 0.1)
+    grown = limiter.stats()["limit"]
+    assert grown > 4
+
+    limiter.acquire()
+    limiter.release(429, 0.1)
+    limiter.acquire()
+    limiter.release(503, 0.1)
+
+    stats = limiter.stats()
+    # The second throttle falls inside the cooldown and does not halve again
+    assert abs(stats["limit"] - grown / 2) < 0.01
+    assert stats["throttled"] == 2
+    assert [event["status_code"] for event in stats["recent_throttle_events"]] == [429]
+
+
+def test_slow_responses_reduce_the_limit():
+    limiter = AdaptiveLimiter(initial=4, latency_target_s=1.0)
+    limiter.acquire()
+    limiter.release(200, 5.0)
+
+    assert limiter.stats()["limit"] == 2
+    assert limiter.stats()["slow"] == 1
+
+
+def test_free_slots_alternate_between_users():
+    limiter = AdaptiveLimiter(initial=1, maximum=1)
+    limiter.acquire("holder")
+    order = []
+
+    def wait(user):
+        limiter.acquire(user)
+        order.append(user)
+        limiter.release(200, 0.0)
+
+    threads = [threading.Thread(target=wait, args=(user,)) for user in ("big", "big", "big", "small")]
+    for t in threads:
+        t.start()
+    # All four are queued before the holder lets go
+    while limiter.stats()["queued"] < 4:
+        pass
+    limiter.release(200, 0.0)
+    for t in threads:
+        t.join()
+
+    assert order.index("small") <= 1
+
+
+def test_limited_get_releases_slot_on_errors():
+    limiter = AdaptiveLimiter()
+    with patch("game_scanner.bgg_throttle._limiter", limiter), patch(
+        "game_scanner.bgg_throttle.requests.get", side_effect=[ConnectionError(), MagicMock(status_code=200)]
+    ):
+        try:
+            limited_get("https://boardgamegeek.com/xmlapi2/plays", user="nraw")
+        except ConnectionError:
+            pass
+        response = limited_get("https://boardgamegeek.com/xmlapi2/plays", user="nraw")
+
+    assert response.status_code == 200
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["requests"], stats["errors"]) == (0, 2, 1)
@@ -0,0 +1,55 @@
+from game_scanner.bgg_xml import iter_elements, parse_collection_item
+
+PLAYS_XML = (
+    b'<?xml version="1.0" encoding="utf-8"?>'
+    b'<plays username="nraw" total="2" page="1">'
+    b'<play id="1" date="2024-01-02"><item name="Azul" objectid="230802"><subtypes/></item></play>'
+    b'<play id="2" date="2024-01-01"><item name="Catan" objectid="13"><subtypes/></item></play>'
+    b"</plays>"
+)
+
+
+def _chunks(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def test_iter_elements_yields_top_level_elements_across_chunks():
+    root_attrib = {}
+    plays = [
+        (play.get("id"), play.find("item").get("name"))
+        for play in iter_elements(_chunks(PLAYS_XML, 7), "play", root_attrib)
+    ]
+
+    assert plays == [("1", "Azul"), ("2", "Catan")]
+    assert root_attrib["total"] == "2"
+
+
+def test_iter_elements_ignores_nested_matches():
+    assert list(iter_elements([PLAYS_XML], "item")) == []
+
+
+def test_parse_collection_item():
+    xml = b'<items><item objectid="13"><name sortindex="1">CATAN</name></item></items>'
+    [item] = iter_elements([xml], "item")
+    record = parse_collection_item(item)
+    assert (record["bgg_id"], record["name"]) == ("13", "CATAN")
+    assert record["min_players"] is None
+
+
+def test_parse_collection_item_with_inline_stats():
+    xml = (
+        b'<items><item objectid="13"><name sortindex="1">CATAN</name><yearpublished>1995</yearpublished>'
+        b'<stats minplayers="3" maxplayers="4" minplaytime="60" maxplaytime="120" playingtime="120">'
+        b'<rating value="N/A"/></stats></item></items>'
+    )
+    [item] = iter_elements([xml], "item")
+    assert parse_collection_item(item) == {
+        "bgg_id": "13",
+        "name": "CATAN",
+        "year": 1995,
+        "min_players": 3,
+        "max_players": 4,
+        "playing_time": 120,
+        "min_playtime": 60,
+        "max_playtime": 120,
+    }
@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+import game_scanner.board_games_dispatch as board_games_dispatch
+
+
+@pytest.fixture(autouse=True)
+def state_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("BOARD_GAMES_DISPATCH_STATE_PATH", str(tmp_path / "dispatch.json"))
+    with patch("game_scanner.board_games_dispatch.start_worker"):
+        yield
+
+
+def test_triggers_are_coalesced_into_one_dispatch():
+    with patch("game_scanner.board_games_dispatch.time.time", side_effect=[100, 110, 120]):
+        for _ in range(3):
+            board_games_dispatch.request_dispatch()
+
+    state = board_games_dispatch._load_state()
+    assert state["triggers"] == 3
+    assert board_games_dispatch._due_at(state) == 120 + board_games_dispatch.DEBOUNCE_S
+
+    with patch("game_scanner.board_games_dispatch.requests.post") as mock_post:
+        assert board_games_dispatch.flush_dispatch()
+        assert not board_games_dispatch.flush_dispatch()
+
+    mock_post.assert_called_once()
+    assert board_games_dispatch._load_state() == {}
+
+
+def _failed_response(status_code):
+    response = MagicMock(status_code=status_code)
+    response.raise_for_status.side_effect = requests.HTTPError(str(status_code), response=response)
+    return response
+
+
+def test_failed_dispatch_stays_pending():
+    board_games_dispatch.request_dispatch()
+
+    with patch("game_scanner.board_games_dispatch.requests.post", return_value=_failed_response(502)):
+        assert not board_games_dispatch.flush_dispatch()
+
+    state = board_games_dispatch._load_state()
+    assert (state["triggers"], state["attempts"]) == (1, 1)
+    assert board_games_dispatch._due_at(state) == state["retry_at"]
+
+
+def test_dispatch_is_dropped_on_client_error_or_after_max_attempts():
+    board_games_dispatch.request_dispatch()
+    with patch("game_scanner.board_games_dispatch.requests.post", return_value=_failed_response(401)):
+        assert not board_games_dispatch.flush_dispatch()
+    assert board_games_dispatch._load_state() == {}
+
+    board_games_dispatch.request_dispatch()
+    with patch(
+        "game_scanner.board_games_dispatch.requests.post", side_effect=requests.ConnectionError("down")
+    ) as mock_post:
+        while board_games_dispatch._load_state():
+            board_games_dispatch.flush_dispatch()
+    assert mock_post.call_count == board_games_dispatch.MAX_ATTEMPTS
+
+
+def test_triggers_during_a_dispatch_wait_for_the_next_one():
+    def post(*args, **kwargs):
+        board_games_dispatch.request_dispatch()
+        return MagicMock()
+
+    with patch("game_scanner.board_games_dispatch.time.time", side_effect=[100, 200]), patch(
+        "game_scanner.board_games_dispatch.requests.post", side_effect=post
+    ):
+        board_games_dispatch.request_dispatch()
+        assert board_games_dispatch.flush_dispatch()
+
+    assert board_games_dispatch._load_state()["triggers"] == 1
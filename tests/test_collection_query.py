@@ -0,0 +1,39 @@
+import pytest
+
+from game_scanner.collection_query import CollectionColumns, columns_for
+
+GAMES = {
+    "1": {"name": "Patchwork", "min_players": 2, "max_players": 2, "playing_time": 30, "weight": 1.6,
+          "year": 2014, "best_at": [2], "recommended_at": [2]},
+    "2": {"name": "Azul", "min_players": 2, "max_players": 4, "playing_time": 45, "weight": 1.8,
+          "year": 2017, "best_at": [2], "recommended_at": [3, 4]},
+    "3": {"name": "Brass", "min_players": 2, "max_players": 4, "playing_time": 120, "weight": 3.9,
+          "year": 2018, "best_at": [3, 4], "recommended_at": [2]},
+    "4": {"name": "Unknown", "min_players": None, "max_players": None, "playing_time": None, "weight": None,
+          "year": None},
+}
+
+
+def test_combined_filters():
+    columns = CollectionColumns(GAMES)
+
+    assert columns.select(player_count=2, max_playtime=45, max_weight=2, best_at=2) == ["1", "2"]
+    assert columns.select(player_count=3, min_weight=3) == ["3"]
+    assert columns.select(recommended_at=2) == ["1", "2", "3"]
+    assert columns.select(best_at=40) == []
+
+
+def test_sorting_puts_unknown_values_last():
+    columns = CollectionColumns(GAMES)
+
+    assert columns.select(sort_by="weight") == ["1", "2", "3", "4"]
+    assert columns.select(sort_by="weight", descending=True, limit=3) == ["3", "2", "1"]
+    assert columns.select(sort_by="name") == ["2", "3", "1", "4"]
+    with pytest.raises(ValueError):
+        columns.select(sort_by="rating")
+
+
+def test_columns_are_built_once_per_index():
+    index = {"games": GAMES}
+
+    assert columns_for(index) is columns_for(index)
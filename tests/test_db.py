@@ -11,3 +11,67 @@ def test_get_collection():
 def test_save_document():
     data = {"game": "Spirit Island", "objectid": "161417"}
     save_document(data, collection_name="playrequests")
+
+
+def test_import_defers_firebase_admin():
+    import subprocess
+    import sys
+
+    code = "import sys, game_scanner.db; print('firebase_admin' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_get_db_connection_initializes_once():
+    import threading
+    from unittest.mock import patch
+
+    import game_scanner.db as db
+
+    with patch.object(db, "_db_client", None), patch.object(
+        db, "_create_db_client", return_value=object()
+    ) as mock_create:
+        threads = [threading.Thread(target=db.get_db_connection) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert mock_create.call_count == 1
+
+
+def test_track_firestore_usage_counts_reads_and_writes():
+    from unittest.mock import MagicMock, patch
+
+    import game_scanner.db as db
+
+    client = MagicMock()
+    raw = client.collection.return_value
+    raw.where.return_value.limit.return_value.get.return_value = [MagicMock(), MagicMock()]
+    raw.where.return_value.stream.return_value = iter([])
+
+    with patch.object(db, "_db_client", client), patch.object(db, "_usage_totals", {}):
+        with db.track_firestore_usage("test.request") as usage:
+            users = db.get_collection("users")
+            users.where("telegram_user_id", "==", 1).limit(1).get()
+            users.document("abc").update({"credits": 3})
+            db.retrieve_messages(42)
+
+        assert usage.collections["users"]["reads"] == 2
+        assert usage.collections["users"]["writes"] == 1
+        assert usage.collections["messages"]["reads"] == 1
+        stats = db.get_firestore_usage_stats()
+        assert stats["test.request"]["requests"] == 1
+        assert stats["test.request"]["reads"] == 3
+
+
+def test_prewarm_makes_one_real_read():
+    from unittest.mock import MagicMock, patch
+
+    import game_scanner.db as db
+
+    client = MagicMock()
+    with patch.object(db, "_db_client", client), patch.object(db, "_usage_totals", {}):
+        db._prewarm()
+        assert db.get_firestore_usage_stats()["untracked"]["reads"] == 1
+
+    client.collection.return_value.document.return_value.get.assert_called_once_with()
@@ -0,0 +1,101 @@
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from game_scanner.firestore_export import export_collection
+
+
+def _make_doc(collection_name, doc_id, data):
+    doc = MagicMock()
+    doc.id = doc_id
+    doc.to_dict.return_value = dict(data)
+    doc.reference.path = f"{collection_name}/{doc_id}"
+    doc.reference.parent.path = collection_name
+    return doc
+
+
+def _fake_stream(docs_by_start):
+    def stream(collection_name, part):
+        docs = docs_by_start[part["start"]]
+        if part["last"]:
+            ids = [d.reference.path for d in docs]
+            docs = docs[ids.index(part["last"]) + 1:]
+        return iter(docs)
+
+    return stream
+
+
+def test_export_streams_all_partitions_to_gzip(tmp_path):
+    docs = {
+        None: [_make_doc("games", "a", {"query": "1"}), _make_doc("games", "b", {"query": "2"})],
+        "games/c": [_make_doc("games", "c", {"query": "3"})],
+    }
+    output = str(tmp_path / "games.ndjson.gz")
+
+    with patch(
+        "game_scanner.firestore_export.get_partition_bounds",
+        return_value=[(None, "games/c"), ("games/c", None)],
+    ), patch("game_scanner.firestore_export._stream_partition", side_effect=_fake_stream(docs)):
+        count = export_collection("games", output, partitions=2)
+
+    with gzip.open(output, "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert count == 3
+    assert sorted(row["doc_id"] for row in rows) == ["a", "b", "c"]
+    assert not (tmp_path / "games.ndjson.gz.checkpoint").exists()
+
+
+def test_export_strips_user_secrets(tmp_path):
+    user = {
+        "bgg_username": "nraw",
+        "api_key": "secret-key",
+        "encrypted_credentials": "xxx",
+        "encryption_key": "yyy",
+    }
+    docs = {None: [_make_doc("users", "secret-key", user)]}
+    output = str(tmp_path / "users.ndjson")
+
+    with patch(
+        "game_scanner.firestore_export.get_partition_bounds", return_value=[(None, None)]
+    ), patch("game_scanner.firestore_export._stream_partition", side_effect=_fake_stream(docs)):
+        export_collection("users", output, partitions=1)
+
+    with open(output) as f:
+        content = f.read()
+    assert json.loads(content) == {"bgg_username": "nraw"}
+    assert "secret-key" not in content
+
+
+def test_failed_user_export_leaves_no_checkpoint(tmp_path):
+    docs = {None: [_make_doc("users", f"secret-key-{i}", {"bgg_username": str(i)}) for i in range(3)]}
+    output = str(tmp_path / "users.ndjson")
+
+    with patch("game_scanner.firestore_export.CHECKPOINT_EVERY", 1), patch(
+        "game_scanner.firestore_export.get_partition_bounds", return_value=[(None, None)]
+    ), patch("game_scanner.firestore_export._stream_partition", side_effect=_fake_stream(docs)), patch(
+        "game_scanner.firestore_export.serialize_document", side_effect=["{}", "{}", RuntimeError("boom")]
+    ):
+        with pytest.raises(RuntimeError):
+            export_collection("users", output, partitions=1)
+
+    assert not (tmp_path / "users.ndjson.checkpoint").exists()
+
+
+def test_export_resumes_from_checkpoint(tmp_path):
+    docs = {None: [_make_doc("games", i, {"query": i}) for i in ("a", "b", "c")]}
+    output = tmp_path / "games.ndjson"
+    output.write_text(json.dumps({"query": "a", "doc_id": "a"}) + "\n")
+    checkpoint = {
+        "collection": "games",
+        "partitions": [{"start": None, "end": None, "last": "games/a", "done": False}],
+    }
+    (tmp_path / "games.ndjson.checkpoint").write_text(json.dumps(checkpoint))
+
+    with patch("game_scanner.firestore_export._stream_partition", side_effect=_fake_stream(docs)):
+        count = export_collection("games", str(output))
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert count == 2
+    assert [row["doc_id"] for row in rows] == ["a", "b", "c"]
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import game_scanner.game_metadata as game_metadata
+from game_scanner.game_metadata import get_games_metadata, get_metadata_stats
+
+THING_XML = b"""<items>
+<item type="boardgame" id="13">
+  <name type="primary" value="CATAN"/>
+  <name type="alternate" value="Die Siedler von Catan"/>
+  <yearpublished value="1995"/>
+  <minplayers value="3"/><maxplayers value="4"/>
+  <playingtime value="120"/><minplaytime value="60"/><maxplaytime value="120"/>
+  <poll name="suggested_numplayers" totalvotes="10">
+    <results numplayers="3"><result value="Best" numvotes="2"/><result value="Recommended" numvotes="6"/>
+      <result value="Not Recommended" numvotes="2"/></results>
+    <results numplayers="4"><result value="Best" numvotes="8"/><result value="Recommended" numvotes="2"/>
+      <result value="Not Recommended" numvotes="0"/></results>
+    <results numplayers="4+"><result value="Best" numvotes="0"/><result value="Recommended" numvotes="0"/>
+      <result value="Not Recommended" numvotes="9"/></results>
+  </poll>
+  <statistics><ratings><averageweight value="2.2977"/></ratings></statistics>
+</item>
+</items>"""
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    with patch.object(game_metadata, "_memory_cache", game_metadata.OrderedDict()), patch.object(
+        game_metadata, "_stats", dict.fromkeys(game_metadata._stats, 0)
+    ):
+        yield
+
+
+def _thing_response():
+    response = MagicMock()
+    response.status_code = 200
+    response.iter_content.return_value = [THING_XML[:100], THING_XML[100:]]
+    return response
+
+
+def test_fetches_parses_and_persists_missing_games():
+    with patch("game_scanner.game_metadata.get_documents", return_value={}), patch(
+        "game_scanner.game_metadata.save_documents"
+    ) as mock_save, patch(
+        "game_scanner.bgg_client.requests.Session.get", return_value=_thing_response()
+    ):
+        records = get_games_metadata([13])
+
+    record = records["13"]
+    assert record["name"] == "CATAN"
+    assert record["alternate_names"] == ["Die Siedler von Catan"]
+    assert (record["min_players"], record["max_players"]) == (3, 4)
+    assert record["weight"] == pytest.approx(2.2977)
+    assert record["year"] == 1995
+    assert (record["best_at"], record["recommended_at"]) == ([4], [3, 4])
+    mock_save.assert_called_once()
+
+
+def test_memory_and_store_hits_skip_bgg():
+    fresh = {
+        "bgg_id": "13",
+        "name": "CATAN",
+        "version": game_metadata.METADATA_VERSION,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with patch(
+        "game_scanner.game_metadata.get_documents", return_value={"13": fresh}
+    ) as mock_read, patch("game_scanner.bgg_client.requests.Session.get") as mock_get:
+        get_games_metadata([13])
+        get_games_metadata([13])
+
+    mock_get.assert_not_called()
+    assert mock_read.call_count == 1
+    stats = get_metadata_stats()
+    assert stats["store_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+
+
+def test_stale_record_is_refreshed_or_served_on_failure():
+    old = (datetime.now(timezone.utc) - timedelta(days=90)).isoformat()
+    stale = {"bgg_id": "13", "name": "Old name", "fetched_at": old}
+    failed = MagicMock(status_code=503)
+
+    with patch("game_scanner.game_metadata.get_documents", return_value={"13": stale}), patch(
+        "game_scanner.bgg_client.requests.Session.get", return_value=failed
+    ), patch("game_scanner.bgg_client.time.sleep"):
+        assert get_games_metadata([13])["13"]["name"] == "Old name"
+
+    with patch("game_scanner.game_metadata.get_documents", return_value={"13": stale}), patch(
+        "game_scanner.game_metadata.save_documents"
+    ), patch("game_scanner.bgg_client.requests.Session.get", return_value=_thing_response()):
+        assert get_games_metadata([13])["13"]["name"] == "CATAN"
+
+    stats = get_metadata_stats()
+    assert stats["stale_served"] == 1
+    assert stats["refreshed"] == 1
+
+
+def test_bgg_lookups_queue_as_the_requesting_user():
+    with patch("game_scanner.game_metadata.get_documents", return_value={}), patch(
+        "game_scanner.game_metadata.save_documents"
+    ), patch("game_scanner.bgg_client.limited_get", return_value=_thing_response()) as mock_get:
+        get_games_metadata([13], user="nraw")
+
+    assert mock_get.call_args.kwargs["user"] == "nraw"
@@ -0,0 +1,233 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import game_scanner.game_metadata as game_metadata
+import game_scanner.list_my_games as list_my_games
+from game_scanner.bgg_throttle import count_requests
+from game_scanner.list_my_games import filter_games_by_playercount
+
+
+def _collection_xml(games, inline_stats=False):
+    items = "".join(
+        f'<item objecttype="thing" objectid="{game_id}"><name>Game {game_id}</name>'
+        + (f'<stats minplayers="{min_players}" maxplayers="{max_players}"/>' if inline_stats else "")
+        + "</item>"
+        for game_id, min_players, max_players in games
+    )
+    return f'<items totalitems="{len(games)}">{items}</items>'.encode()
+
+
+def _thing_xml(games):
+    items = "".join(
+        f'<item type="boardgame" id="{game_id}">'
+        f'<minplayers value="{min_players}"/><maxplayers value="{max_players}"/></item>'
+        for game_id, min_players, max_players in games
+    )
+    return f"<items>{items}</items>".encode()
+
+
+def _fake_bgg(games, inline_stats=False):
+    by_id = {str(game[0]): game for game in games}
+
+    def get(url, **kwargs):
+        response = MagicMock()
+        response.status_code = 200
+        if "/collection" in url:
+            response.iter_content.return_value = [_collection_xml(games, inline_stats)]
+        else:
+            ids = url.split("id=")[1].split("&")[0].split(",")
+            response.iter_content.return_value = [_thing_xml([by_id[i] for i in ids])]
+        return response
+
+    return get
+
+
+@pytest.fixture(autouse=True)
+def _empty_metadata_store():
+    with patch.object(game_metadata, "_memory_cache", game_metadata.OrderedDict()), patch.object(
+        list_my_games, "_snapshots", {}
+    ), patch(
+        "game_scanner.game_metadata.get_documents", return_value={}
+    ), patch("game_scanner.game_metadata.save_documents"):
+        yield
+
+
+def test_filter_fetches_details_in_chunks():
+    games = [(i, 1 + i % 2, 2 + i % 4) for i in range(1, 46)]
+
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg(games)
+    ) as mock_get:
+        filtered = filter_games_by_playercount("nraw", 4)
+
+    thing_calls = [c for c in mock_get.call_args_list if "/thing" in c.args[0]]
+    assert len(thing_calls) == 3
+    expected = {str(i) for i, lo, hi in games if lo <= 4 <= hi}
+    assert {game["bgg_id"] for game in filtered} == expected
+
+
+def test_inline_collection_stats_skip_thing_lookups():
+    games = [(i, 1 + i % 2, 2 + i % 4) for i in range(1, 46)]
+
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg(games, inline_stats=True)
+    ) as mock_get:
+        filtered = filter_games_by_playercount("nraw", 4)
+
+    assert [c.args[0] for c in mock_get.call_args_list if "/thing" in c.args[0]] == []
+    assert {game["bgg_id"] for game in filtered} == {str(i) for i, lo, hi in games if lo <= 4 <= hi}
+
+
+def test_filter_leaves_the_fetched_collection_untouched():
+    fetched = [{"bgg_id": "1", "name": "Game 1", "min_players": None, "max_players": None}]
+    details = {"1": {"min_players": 2, "max_players": 4, "playing_time": 30, "weight": 2.0, "year": 2020}}
+
+    with patch("game_scanner.list_my_games.fetch_collection", return_value=(fetched, 0.0)), patch(
+        "game_scanner.list_my_games.get_games_details", return_value=details
+    ):
+        assert [game["min_players"] for game in filter_games_by_playercount("nraw", 3)] == [2]
+
+    assert fetched == [{"bgg_id": "1", "name": "Game 1", "min_players": None, "max_players": None}]
+
+
+def test_details_are_served_from_shared_cache():
+    games = [(1, 2, 4), (2, 1, 1)]
+
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg(games)
+    ) as mock_get:
+        filter_games_by_playercount("nraw", 2)
+        filter_games_by_playercount("someone_else", 1)
+
+    thing_calls = [c for c in mock_get.call_args_list if "/thing" in c.args[0]]
+    assert len(thing_calls) == 1
+
+
+def _response(status_code, content=b""):
+    response = MagicMock()
+    response.status_code = status_code
+    response.iter_content.return_value = [content]
+    return response
+
+
+def test_collection_polls_through_202_queue():
+    responses = [_response(202), _response(202), _response(200, _collection_xml([(1, 2, 4)]))]
+
+    with patch("game_scanner.bgg_client.requests.Session.get", side_effect=responses), patch(
+        "game_scanner.bgg_client.time.sleep"
+    ) as mock_sleep:
+        games, _ = list_my_games.fetch_collection("nraw")
+
+    assert [(game["bgg_id"], game["name"]) for game in games] == [("1", "Game 1")]
+    assert mock_sleep.call_count == 2
+
+
+def test_collection_raises_after_deadline():
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", return_value=_response(202)
+    ), patch("game_scanner.bgg_client.time.sleep"), patch.object(
+        list_my_games, "COLLECTION_DEADLINE_S", 0
+    ):
+        with pytest.raises(list_my_games.BGGCollectionNotReadyError):
+            list_my_games.fetch_collection("nraw")
+
+
+def test_concurrent_collection_fetches_share_one_poller():
+    import threading
+    import time
+
+    release = threading.Event()
+
+    def slow_get(url, **kwargs):
+        release.wait(timeout=5)
+        return _response(200, _collection_xml([(1, 2, 4)]))
+
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=slow_get
+    ) as mock_get:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(list_my_games.get_all_games("nraw")))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        # Give the followers time to find the in-flight poller
+        time.sleep(0.1)
+        release.set()
+        for t in threads:
+            t.join()
+
+    assert mock_get.call_count == 1
+    assert len(results) == 4
+
+
+def test_fresh_snapshot_costs_no_bgg_calls():
+    with patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg([(1, 2, 4)])
+    ) as mock_get:
+        first = list_my_games.get_all_games("nraw")
+        first[0]["name"] = "mutated"
+        second = list_my_games.get_all_games("NRAW")
+
+    assert mock_get.call_count == 1
+    assert second[0]["name"] == "Game 1"
+
+
+def test_stale_snapshot_is_served_while_refreshing():
+    list_my_games._snapshots["nraw"] = {
+        "games": [{"bgg_id": "1", "name": "Game 1"}],
+        "hash": "old",
+        "fetched_at": list_my_games.time.time() - list_my_games.SNAPSHOT_TTL_S - 1,
+    }
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=([{"bgg_id": "2", "name": "Game 2"}], 0.0)
+    ), patch("game_scanner.list_my_games.threading.Thread") as mock_thread:
+        games = list_my_games.get_all_games("nraw")
+        mock_thread.call_args.kwargs["target"]()
+
+    assert games == [{"bgg_id": "1", "name": "Game 1"}]
+    assert list_my_games._snapshots["nraw"]["games"] == [{"bgg_id": "2", "name": "Game 2"}]
+    assert list_my_games._snapshots["nraw"]["hash"] != "old"
+
+
+@pytest.mark.parametrize("inline_stats, expected_requests", [(False, 4), (True, 1)])
+def test_requests_per_get_my_games_call(inline_stats, expected_requests):
+    games = [(i, 1 + i % 2, 2 + i % 4) for i in range(1, 46)]
+
+    with patch("game_scanner.player_count_index._indexes", {}), patch(
+        "game_scanner.player_count_index.get_collection"
+    ) as mock_collection, patch(
+        "game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg(games, inline_stats)
+    ), count_requests() as bgg:
+        mock_collection.return_value.document.return_value.get.return_value.exists = False
+        list_my_games.get_my_games(4, username="nraw")
+
+    assert bgg["requests"] == expected_requests
+
+
+def test_failed_collection_fetch_keeps_snapshot_and_index():
+    with patch("game_scanner.player_count_index._indexes", {}), patch(
+        "game_scanner.player_count_index.get_collection"
+    ) as mock_collection:
+        mock_collection.return_value.document.return_value.get.return_value.exists = False
+        with patch("game_scanner.bgg_client.requests.Session.get", side_effect=_fake_bgg([(1, 2, 4)], True)):
+            assert [game["bgg_id"] for game in list_my_games.get_my_games(3, username="nraw")] == ["1"]
+
+        snapshot = list_my_games._snapshots["nraw"]
+        list_my_games._snapshots["nraw"] = {**snapshot, "fetched_at": 0}
+        with patch("game_scanner.bgg_client.requests.Session.get", return_value=_response(500)), patch.object(
+            list_my_games, "COLLECTION_DEADLINE_S", 0
+        ):
+            assert [game["bgg_id"] for game in list_my_games.get_my_games(3, username="nraw")] == ["1"]
+
+    assert list_my_games._snapshots["nraw"]["games"] == snapshot["games"]
+
+
+def test_failed_first_collection_fetch_raises():
+    with patch("game_scanner.bgg_client.requests.Session.get", return_value=_response(404)):
+        with pytest.raises(list_my_games.BGGCollectionFetchError):
+            list_my_games.get_all_games("nraw")
+
+    assert "nraw" not in list_my_games._snapshots
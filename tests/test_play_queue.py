@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock, patch
+
+import os
+import stat
+
+import pytest
+
+import game_scanner.play_queue as play_queue
+from game_scanner import user_auth
+from game_scanner.errors import BGGLoginError
+
+start_worker = play_queue.start_worker
+
+
+@pytest.fixture(autouse=True)
+def queue_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLAY_QUEUE_PATH", str(tmp_path / "queue.sqlite3"))
+    with patch("game_scanner.play_queue.start_worker"), patch("game_scanner.play_queue._notify") as mock_notify, patch(
+        "game_scanner.play_queue.get_credentials_by_telegram_id", return_value=("nraw", "secret")
+    ), patch("game_scanner.play_queue.mirror_logged_play"):
+        yield mock_notify
+
+
+def _response(play_id):
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"playid": play_id}
+    return response
+
+
+def test_queued_play_is_logged_by_the_worker(queue_path):
+    job_id = play_queue.enqueue_play({"game_id": 13, "quantity": 2}, telegram_user_id=7, chat_id=42)
+    assert play_queue.get_job(job_id)["status"] == "queued"
+
+    with patch("game_scanner.play_queue.register_to_bgg", return_value=_response(555)) as mock_register:
+        assert play_queue.drain_queue() == 1
+
+    payload, username, password = mock_register.call_args.args
+    assert (payload["objectid"], payload["quantity"], username, password) == ("13", 2, "nraw", "secret")
+    job = play_queue.get_job(job_id)
+    assert (job["status"], job["play_id"], job["attempts"]) == ("done", "555", 1)
+    assert queue_path.call_args.args[1:] == ("done", 555, None)
+
+
+def test_failed_play_is_retried_later_and_keeps_user_order():
+    first = play_queue.enqueue_play({"game_id": 13}, telegram_user_id=7)
+    second = play_queue.enqueue_play({"game_id": 822}, telegram_user_id=7)
+
+    with patch("game_scanner.play_queue.register_to_bgg", side_effect=ConnectionError("BGG down")) as mock_register:
+        assert play_queue.drain_queue() == 1
+
+    # The second play waits behind the first one's backoff
+    mock_register.assert_called_once()
+    job = play_queue.get_job(first)
+    assert (job["status"], job["error"]) == ("queued", "BGG down")
+    assert play_queue.get_job(second)["status"] == "queued"
+
+    with patch("game_scanner.play_queue.time.time", return_value=job["next_attempt_at"] + 1), patch(
+        "game_scanner.play_queue.register_to_bgg", return_value=_response(1)
+    ) as mock_register:
+        assert play_queue.drain_queue() == 2
+
+    assert [call.args[0]["objectid"] for call in mock_register.call_args_list] == ["13", "822"]
+    assert play_queue.get_job(first)["attempts"] == 2
+
+
+def test_login_failure_is_not_retried():
+    job_id = play_queue.enqueue_play({"game_id": 13}, telegram_user_id=7)
+
+    error = BGGLoginError("nraw", 401)
+    with patch("game_scanner.play_queue.register_to_bgg", side_effect=error):
+        play_queue.drain_queue()
+
+    job = play_queue.get_job(job_id)
+    assert (job["status"], job["attempts"]) == ("failed", 1)
+
+
+def test_credentials_store_error_is_retried():
+    job_id = play_queue.enqueue_play({"game_id": 13}, telegram_user_id=7)
+
+    with patch("game_scanner.play_queue.get_credentials_by_telegram_id", user_auth.get_credentials_by_telegram_id), patch(
+        "game_scanner.user_auth.get_collection", side_effect=ConnectionError("Firestore down")
+    ):
+        play_queue.drain_queue()
+
+    job = play_queue.get_job(job_id)
+    assert (job["status"], job["error"]) == ("queued", "Firestore down")
+
+
+def test_queue_file_is_private_and_holds_no_api_keys():
+    play_queue.enqueue_play({"game_id": 13}, telegram_user_id=7)
+
+    path = os.environ["PLAY_QUEUE_PATH"]
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    conn = play_queue.open_queue()
+    try:
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(play_jobs)")}
+    finally:
+        conn.close()
+    assert "api_key" not in columns
+
+
+def test_jobs_interrupted_by_a_restart_are_not_posted_again(queue_path):
+    job_id = play_queue.enqueue_play({"game_id": 13}, telegram_user_id=7)
+    conn = play_queue.open_queue()
+    with conn:
+        conn.execute("UPDATE play_jobs SET status = 'running'")
+    conn.close()
+
+    with patch.object(play_queue, "_worker", None), patch("game_scanner.play_queue.threading.Thread"), patch(
+        "game_scanner.play_queue.register_to_bgg"
+    ) as mock_register:
+        start_worker()
+        assert play_queue.drain_queue() == 0
+
+    mock_register.assert_not_called()
+    assert play_queue.get_job(job_id)["status"] == "unknown"
+    assert queue_path.call_args.args[1] == "unknown"
@@ -0,0 +1,66 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from game_scanner.play_stats import PlayColumns, get_play_stats
+
+
+def _play(play_date, game_id, game, quantity=1):
+    return dict(play_id="1", date=play_date, game=game, game_id=game_id, comment=None, quantity=quantity)
+
+
+# Newest first, like the plays mirror returns them
+PLAYS = [
+    _play("2024-03-05", "822", "Carcassonne"),
+    _play("2024-03-04", "13", "CATAN", quantity=3),
+    _play("2024-03-03", "822", "Carcassonne"),
+    _play("2024-02-26", "13", "Catan", quantity=2),
+    _play("2024-01-01", "230802", "Azul"),
+    _play("2023-12-31", "13", "Catan", quantity=5),
+]
+
+
+def test_h_index_and_milestones_count_quantities():
+    columns = PlayColumns(PLAYS)
+
+    assert columns.plays_per_game().tolist() == [10, 2, 1]
+    assert columns.h_index() == 2
+    assert columns.milestones() == {"dimes": ["CATAN"], "nickels": []}
+
+
+def test_period_counts():
+    columns = PlayColumns(PLAYS)
+
+    assert columns.period_counts("year") == {"2023": 5, "2024": 8}
+    assert columns.period_counts("month") == {"2023-12": 5, "2024-01": 1, "2024-02": 2, "2024-03": 5}
+    # Weeks are keyed by their Monday
+    assert columns.period_counts("week") == {"2023-12-25": 5, "2024-01-01": 1, "2024-02-26": 3, "2024-03-04": 4}
+    with pytest.raises(ValueError):
+        columns.period_counts("decade")
+
+
+def test_streaks():
+    columns = PlayColumns(PLAYS)
+
+    assert columns.streaks(today=date(2024, 3, 6)) == {
+        "longest": 3, "longest_from": "2024-03-03", "longest_to": "2024-03-05", "current": 3,
+    }
+    assert columns.streaks(today=date(2024, 3, 7))["current"] == 0
+    assert PlayColumns([]).streaks() == {"longest": 0, "current": 0}
+
+
+def test_play_stats_of_a_date_range():
+    recent = [play for play in PLAYS if play["date"] >= "2024-01-01"]
+    with patch("game_scanner.play_stats.list_played_games", return_value=recent) as mock_plays:
+        result = get_play_stats(stats=["top_games"], since="2024-01-01", until="2024-03-04", top_n=2)
+
+    mock_plays.assert_called_once_with(since="2024-01-01", username=None, password=None)
+    assert result == {
+        "plays": 7,
+        "games": 3,
+        "top_games": [
+            {"game": "CATAN", "game_id": "13", "plays": 5, "first_play": "2024-02-26", "last_play": "2024-03-04"},
+            {"game": "Carcassonne", "game_id": "822", "plays": 1, "first_play": "2024-03-03", "last_play": "2024-03-03"},
+        ],
+    }
@@ -0,0 +1,112 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import game_scanner.list_my_games as list_my_games
+import game_scanner.player_count_index as player_count_index
+from game_scanner.list_my_games import get_my_games
+
+METADATA = {
+    "1": {"name": "Solo", "min_players": 1, "max_players": 1},
+    "2": {"name": "Duel", "min_players": 2, "max_players": 2},
+    "3": {"name": "Party", "min_players": 4, "max_players": 20},
+}
+
+
+def _metadata(game_ids, user=None):
+    return {game_id: METADATA[game_id] for game_id in game_ids if game_id in METADATA}
+
+
+@pytest.fixture(autouse=True)
+def _isolated_index():
+    collection = MagicMock()
+    collection.document.return_value.get.return_value.exists = False
+    with patch.object(player_count_index, "_indexes", {}), patch.object(list_my_games, "_snapshots", {}), patch(
+        "game_scanner.player_count_index.get_collection", return_value=collection
+    ), patch(
+        "game_scanner.player_count_index.get_games_metadata", side_effect=_metadata
+    ) as mock_metadata:
+        yield mock_metadata
+
+
+def _collection(*game_ids):
+    return [{"bgg_id": game_id, "name": METADATA[game_id]["name"]} for game_id in game_ids]
+
+
+def test_repeat_queries_are_answered_from_index():
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=(_collection("1", "2", "3"), 0.0)
+    ) as mock_fetch:
+        assert [g["bgg_id"] for g in get_my_games(2, username="nraw")] == ["2"]
+        assert [g["bgg_id"] for g in get_my_games(1, username="nraw")] == ["1"]
+        assert [g["bgg_id"] for g in get_my_games(15, username="nraw")] == ["3"]
+
+    assert mock_fetch.call_count == 1
+
+
+def test_sync_only_looks_up_added_games(_isolated_index):
+    index = player_count_index.sync_index("nraw", _collection("1", "2"))
+    _isolated_index.reset_mock()
+
+    index = player_count_index.sync_index("nraw", _collection("2", "3"), index)
+
+    _isolated_index.assert_called_once_with(["3"], user="nraw")
+    assert set(index["games"]) == {"2", "3"}
+    [game] = player_count_index.lookup(index, 4)
+    assert (game["bgg_id"], game["name"], game["max_players"]) == ("3", "Party", 20)
+
+
+def test_add_game_updates_existing_index():
+    player_count_index.sync_index("nraw", _collection("1"))
+
+    player_count_index.add_game("NRAW", "2")
+
+    index = player_count_index.load_index("nraw")
+    assert [g["bgg_id"] for g in player_count_index.lookup(index, 2)] == ["2"]
+
+
+def test_changed_collection_resyncs_index(_isolated_index):
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=(_collection("1", "2"), 0.0)
+    ):
+        assert [g["bgg_id"] for g in get_my_games(2, username="nraw")] == ["2"]
+
+    list_my_games._snapshots.clear()
+    _isolated_index.reset_mock()
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=(_collection("1", "2"), 0.0)
+    ):
+        get_my_games(2, username="nraw")
+    _isolated_index.assert_not_called()
+
+    list_my_games._snapshots.clear()
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=(_collection("2", "3"), 0.0)
+    ):
+        assert [g["bgg_id"] for g in get_my_games(4, username="nraw")] == ["3"]
+    _isolated_index.assert_called_once_with(["3"], user="nraw")
+
+
+def test_combined_filters_are_answered_from_index():
+    with patch(
+        "game_scanner.list_my_games.fetch_collection", return_value=(_collection("1", "2", "3"), 0.0)
+    ):
+        games = get_my_games(None, username="nraw", max_weight=None, sort_by="name", descending=True, limit=2)
+
+    assert [g["name"] for g in games] == ["Solo", "Party"]
+
+
+def test_inline_stats_defer_metadata_until_a_filter_needs_it(_isolated_index):
+    inline = [
+        {"bgg_id": game_id, "name": METADATA[game_id]["name"], "min_players": METADATA[game_id]["min_players"],
+         "max_players": METADATA[game_id]["max_players"]}
+        for game_id in ("1", "2", "3")
+    ]
+    with patch("game_scanner.list_my_games.fetch_collection", return_value=(inline, 0.0)):
+        assert [g["bgg_id"] for g in get_my_games(2, username="nraw")] == ["2"]
+        _isolated_index.assert_not_called()
+
+        get_my_games(None, username="nraw", max_weight=2)
+        get_my_games(None, username="nraw", min_weight=1)
+
+    _isolated_index.assert_called_once_with(["1", "2", "3"], user="nraw")
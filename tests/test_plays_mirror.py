@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pytest
+
+import game_scanner.plays_mirror as plays_mirror
+from game_scanner.register_play import delete_logged_play, list_played_games
+
+
+def _play(play_id, play_date, game_id="13", game="CATAN", quantity=1):
+    return dict(play_id=str(play_id), date=play_date, game=game, game_id=game_id, comment=None, quantity=quantity)
+
+
+HISTORY = [
+    _play(3, "2024-03-01", "822", "Carcassonne"),
+    _play(2, "2024-02-01", quantity=2),
+    _play(1, "2023-01-01"),
+]
+
+
+@pytest.fixture(autouse=True)
+def mirror_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLAYS_MIRROR_PATH", str(tmp_path / "plays.sqlite3"))
+
+
+def test_queries_are_answered_locally_after_first_sync():
+    with patch("game_scanner.register_play.get_logged_plays", return_value=HISTORY) as mock_fetch:
+        assert list_played_games(username="nraw") == HISTORY
+        assert list_played_games(game_ids=[13], username="nraw") == HISTORY[1:]
+        assert list_played_games(since="2024-01-01", last_n=1, username="NRAW") == HISTORY[:1]
+
+    mock_fetch.assert_called_once_with(since=None, username="nraw")
+
+
+def test_incremental_sync_replaces_the_recent_window():
+    with patch("game_scanner.register_play.get_logged_plays", return_value=HISTORY):
+        plays_mirror.sync_plays("nraw")
+
+    # Play 3 was deleted on BGG and play 4 logged; play 1 is outside the window
+    recent = [_play(4, "2024-03-02"), HISTORY[1]]
+    with patch("game_scanner.register_play.get_logged_plays", return_value=recent) as mock_fetch:
+        plays_mirror.sync_plays("nraw", force=True)
+
+    mock_fetch.assert_called_once_with(since="2024-01-31", username="nraw")
+    with patch("game_scanner.register_play.get_logged_plays") as mock_fetch:
+        assert [play["play_id"] for play in plays_mirror.get_plays(username="nraw")] == ["4", "2", "1"]
+    mock_fetch.assert_not_called()
+
+
+def test_writes_update_the_mirror():
+    with patch("game_scanner.register_play.get_logged_plays", return_value=HISTORY):
+        plays_mirror.sync_plays("nraw")
+
+    with patch("game_scanner.plays_mirror.get_game_metadata", return_value={"name": "Azul"}):
+        plays_mirror.record_play("nraw", "5", {"playdate": "2024-04-01", "objectid": "230802", "quantity": 1})
+    with patch("game_scanner.register_play.bgg_post") as mock_post:
+        mock_post.return_value.status_code = 200
+        delete_logged_play(3, username="nraw", password="secret")
+
+    plays = plays_mirror.get_plays(username="nraw")
+    assert [(play["play_id"], play["game"]) for play in plays] == [("5", "Azul"), ("2", "CATAN"), ("1", "CATAN")]
+
+
+def test_recent_plays_skip_the_full_sync_until_it_ran_in_background():
+    with patch("game_scanner.register_play.iter_logged_plays", return_value=iter(HISTORY[:1])) as mock_iter, patch(
+        "game_scanner.register_play.get_logged_plays", return_value=HISTORY
+    ) as mock_fetch, patch("game_scanner.plays_mirror.threading.Thread") as mock_thread:
+        assert list_played_games(last_n=1, username="nraw") == HISTORY[:1]
+        mock_fetch.assert_not_called()
+        mock_thread.call_args.kwargs["target"]()
+
+    mock_iter.assert_called_once_with(None, 1, None, "nraw")
+    mock_fetch.assert_called_once_with(since=None, username="nraw")
+    with patch("game_scanner.register_play.iter_logged_plays") as mock_iter:
+        assert list_played_games(last_n=2, username="nraw") == HISTORY[:2]
+    mock_iter.assert_not_called()
@@ -1,11 +1,18 @@
 import json
 import os
+from unittest.mock import MagicMock, patch
 
+import pytest
 import requests
 
 from game_scanner.register_play import *
 
 
+@pytest.fixture(autouse=True)
+def mirror_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("PLAYS_MIRROR_PATH", str(tmp_path / "plays.sqlite3"))
+
+
 def test_bgg_login():
     login_payload = {"credentials": {"username": os.environ["BGG_USERNAME"], "password": os.environ["BGG_PASS"]}}
     headers = {"content-type": "application/json"}
@@ -31,3 +38,81 @@ def test_get_logged_plays():
         game_ids=game_ids, last_n=last_n, since=since, username=username
     )
     assert len(plays) > 0
+
+
+def test_log_plays_to_bgg_reports_each_play():
+    def post(url, username, password, json):
+        if json["objectid"] == "2":
+            return MagicMock(status_code=500, text="boom")
+        return MagicMock(status_code=200, json=lambda: {"playid": f"p{json['objectid']}"})
+
+    plays = [{"game_id": 1, "quantity": 2}, {"game_id": 2}, {"quantity": 1}, {"game_id": 3, "notes": "close one"}]
+    with patch("game_scanner.register_play.ensure_logged_in") as mock_login, patch(
+        "game_scanner.register_play.bgg_post", side_effect=post
+    ), patch("game_scanner.register_play.update_my_board_games") as mock_update:
+        result = log_plays_to_bgg(plays, username="nraw", password="secret")
+
+    mock_login.assert_called_once_with("nraw", "secret")
+    mock_update.assert_not_called()
+    assert (result["logged"], result["failed"]) == (2, 2)
+    assert [play["status"] for play in result["plays"]] == ["logged", "failed", "invalid", "logged"]
+    assert result["plays"][0]["play_id"] == "p1"
+
+
+def _fake_plays_pages(total, game_ids=(13, 822)):
+    def get(url, **kwargs):
+        page = int(url.split("page=")[1].split("&")[0])
+        first = (page - 1) * 100
+        plays = "".join(
+            f'<play id="{n}" date="2024-01-{1 + n % 28:02d}" quantity="1">'
+            f'<item name="Game {game_ids[n % 2]}" objectid="{game_ids[n % 2]}"><subtypes/></item></play>'
+            for n in range(first, min(first + 100, total))
+        )
+        response = MagicMock(status_code=200)
+        response.__enter__.return_value = response
+        response.iter_content.return_value = [f'<plays username="nraw" total="{total}" page="{page}">{plays}</plays>'.encode()]
+        return response
+
+    return get
+
+
+def test_get_logged_plays_fetches_pages_concurrently_in_order():
+    with patch("game_scanner.bgg_client.requests.Session.get", side_effect=_fake_plays_pages(250)) as mock_get:
+        plays = get_logged_plays(username="nraw")
+
+    assert [int(play["play_id"]) for play in plays] == list(range(250))
+    assert mock_get.call_count == 3
+
+
+def test_iter_logged_plays_stops_fetching_when_satisfied():
+    with patch("game_scanner.bgg_client.requests.Session.get", side_effect=_fake_plays_pages(250)) as mock_get:
+        plays = get_logged_plays(last_n=150, username="nraw")
+        assert [int(play["play_id"]) for play in plays] == list(range(150))
+        assert mock_get.call_count == 2
+
+        mock_get.reset_mock()
+        first = next(iter_logged_plays(username="nraw"))
+        assert first["play_id"] == "0"
+        assert mock_get.call_count == 1
+
+
+def test_single_game_filter_is_sent_to_bgg():
+    with patch("game_scanner.bgg_client.requests.Session.get", side_effect=_fake_plays_pages(50)) as mock_get:
+        plays = list(iter_logged_plays(game_ids=[13], username="nraw"))
+
+    assert "&id=13" in mock_get.call_args.args[0]
+    assert {play["game_id"] for play in plays} == {"13"}
+
+
+def test_delete_logged_plays_reports_each_play():
+    def post(url, username, password, json):
+        return MagicMock(status_code=500 if json["playid"] == 2 else 200, text="")
+
+    with patch("game_scanner.register_play.ensure_logged_in") as mock_login, patch(
+        "game_scanner.register_play.bgg_post", side_effect=post
+    ), patch("game_scanner.register_play.plays_mirror.remove_play"):
+        result = delete_logged_plays([1, 2, 3], username="nraw", password="secret")
+
+    mock_login.assert_called_once_with("nraw", "secret")
+    assert (result["deleted"], result["failed"]) == (2, 1)
+    assert [play["status"] for play in result["plays"]] == ["deleted", "failed", "deleted"]
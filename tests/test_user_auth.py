@@ -98,4 +98,77 @@ class TestAuthenticateUser:
         mock_create.side_effect = ValueError("BGG username already registered")
         
         with pytest.raises(ValueError, match="Invalid credentials"):
-            authenticate_user("existing_user", "wrong_password")
\ No newline at end of file
+            authenticate_user("existing_user", "wrong_password")
+
+class TestCredentialsCache:
+    """Test caching of verify_and_get_credentials."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        from game_scanner import user_auth
+
+        with patch.object(user_auth, "_credentials_cache", user_auth.OrderedDict()), patch.object(
+            user_auth, "_invalid_lookups", user_auth.deque()
+        ):
+            yield
+
+    @staticmethod
+    def _users(exists=True):
+        mock_collection = Mock()
+        mock_collection.document.return_value.get.return_value.exists = exists
+        mock_collection.document.return_value.get.return_value.to_dict.return_value = {
+            "encrypted_credentials": "mock_encrypted_creds",
+            "encryption_key": "bW9ja19rZXk=",
+        }
+        return mock_collection
+
+    @patch('game_scanner.user_auth.decrypt_credentials', return_value=("test_user", "secret"))
+    @patch('game_scanner.user_auth.get_collection')
+    def test_credentials_are_read_once_until_invalidated(self, mock_get_collection, mock_decrypt):
+        """Test a burst of requests costs one read, and deletion drops the cached credentials."""
+        from game_scanner.user_auth import delete_user, verify_and_get_credentials
+
+        mock_get_collection.return_value = self._users()
+
+        assert verify_and_get_credentials("key") == ("test_user", "secret")
+        assert verify_and_get_credentials("key") == ("test_user", "secret")
+        assert mock_decrypt.call_count == 1
+
+        delete_user("key")
+        mock_get_collection.return_value = self._users(exists=False)
+        assert verify_and_get_credentials("key") is None
+
+    @patch('game_scanner.user_auth.time.sleep')
+    @patch('game_scanner.user_auth.get_collection')
+    def test_invalid_keys_are_cached_and_throttled(self, mock_get_collection, mock_sleep):
+        """Test unknown keys are remembered, and many of them slow further lookups down."""
+        from game_scanner import user_auth
+
+        users = self._users(exists=False)
+        mock_get_collection.return_value = users
+
+        assert user_auth.verify_and_get_credentials("bad") is None
+        assert user_auth.verify_and_get_credentials("bad") is None
+        assert users.document.call_count == 1
+        mock_sleep.assert_not_called()
+
+        for i in range(user_auth.MAX_INVALID_KEYS_PER_MIN):
+            user_auth.verify_and_get_credentials(f"guess-{i}")
+        mock_sleep.assert_called_once_with(user_auth.THROTTLED_LOOKUP_DELAY_S)
+
+        # Valid keys are answered without delay while guessing is throttled
+        mock_get_collection.return_value = self._users()
+        with patch('game_scanner.user_auth.decrypt_credentials', return_value=("test_user", "secret")):
+            assert user_auth.verify_and_get_credentials("valid") == ("test_user", "secret")
+        mock_sleep.assert_called_once()
+
+    @patch('game_scanner.user_auth.get_collection')
+    def test_read_errors_are_not_cached(self, mock_get_collection):
+        """Test a failed read does not mark a key as invalid."""
+        from game_scanner.user_auth import verify_and_get_credentials
+
+        mock_get_collection.side_effect = [ConnectionError("firestore down"), self._users()]
+
+        with patch('game_scanner.user_auth.decrypt_credentials', return_value=("test_user", "secret")):
+            assert verify_and_get_credentials("key") is None
+            assert verify_and_get_credentials("key") == ("test_user", "secret")